@@ -0,0 +1,142 @@
+import multiprocessing
+import resource
+import time
+from argparse import ArgumentParser
+from queue import Empty
+
+from mock_blaze_server import mock_blaze_server
+
+SIZES = (1000, 100000, 1000000)
+METHODS = (
+    'get_products',
+    'get_vendors',
+    'get_brands',
+    'get_curr_inventory',
+    'get_members',
+    'get_employees',
+    'get_item_sales',
+    'get_transactions',
+    'get_purchase_orders',
+    'get_po_line_items'
+    )
+
+
+def _run(base_url: str, method: str, max_workers: int, queue) -> None:
+    """Call one get_* method against the mock server in a fresh process
+    and report rows, wall time and the process' peak RSS.
+    """
+    # blaze_retail_api imports pandas and numpy on first use; load them
+    # here so the import is not timed as part of the call
+    import numpy  # noqa: F401
+    import pandas  # noqa: F401
+    from blaze_retail_api import blaze_retail_api
+    b = blaze_retail_api(
+        partner_key='bench', Authorization='bench', base_url=base_url,
+        pool_connections=max_workers, pool_maxsize=max_workers
+        )
+    kwargs = {'max_workers': max_workers}
+    if method in ('get_item_sales', 'get_transactions', 'get_members',
+                  'get_purchase_orders', 'get_po_line_items'):
+        kwargs.update(start_date='01/01/2023', end_date='01/02/2023')
+    start = time.perf_counter()
+    try:
+        dat = getattr(b, method)(**kwargs)
+    except Exception as e:
+        queue.put({'error': repr(e)})
+        raise
+    wall = time.perf_counter() - start
+    b.close()
+    queue.put({
+        'rows': len(dat) if hasattr(dat, '__len__') else 0,
+        'wall': wall,
+        'rss': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        })
+
+
+def _result(proc, queue, poll: float = 1.0) -> dict:
+    """Wait for a benchmark process' result. If the process dies without
+    reporting one, e.g. killed for running out of memory, return an error
+    instead of waiting forever.
+    """
+    while True:
+        try:
+            return queue.get(timeout=poll)
+        except Empty:
+            if not proc.is_alive():
+                # it may have put its result just before exiting
+                try:
+                    return queue.get(timeout=poll)
+                except Empty:
+                    return {
+                        'error': f'process exited with code {proc.exitcode} '
+                        'without a result'
+                        }
+
+
+def bench(
+        size: int,
+        methods=METHODS,
+        max_workers: int = 8,
+        latency: float = 0.0
+        ) -> list:
+    """Benchmark get_* methods against a mock server with size records per
+    endpoint. Each call runs in its own spawned process so its peak RSS is
+    measured on its own.
+
+    Args:
+        size (int): nbr of records per endpoint.
+        methods (tuple, optional): get_* method names. Defaults to METHODS.
+        max_workers (int, optional): max_workers passed to each call.
+            Defaults to 8.
+        latency (float, optional): seconds of server latency per page.
+            Defaults to 0.0.
+
+    Returns:
+        list: one dict of results per method.
+    """
+    ctx = multiprocessing.get_context('spawn')
+    results = []
+    with mock_blaze_server(records=size, latency=latency) as server:
+        for method in methods:
+            requests_before = server.stats['requests']
+            queue = ctx.Queue()
+            proc = ctx.Process(
+                target=_run,
+                args=(server.base_url, method, max_workers, queue)
+                )
+            proc.start()
+            result = _result(proc, queue)
+            proc.join()
+            if 'error' in result:
+                raise RuntimeError(f'{method} failed: {result["error"]}')
+            pages = server.stats['requests'] - requests_before
+            results.append({
+                'size': size, 'method': method, 'pages': pages,
+                'pages_per_sec': pages / result['wall'],
+                'records_per_sec': result['rows'] / result['wall'],
+                **result
+                })
+    return results
+
+
+if __name__ == '__main__':
+    parser = ArgumentParser(
+        description='Benchmark blaze_retail_api against a mock server.'
+        )
+    parser.add_argument('--sizes', type=int, nargs='+', default=SIZES)
+    parser.add_argument('--methods', nargs='+', default=METHODS)
+    parser.add_argument('--max-workers', type=int, default=8)
+    parser.add_argument('--latency', type=float, default=0.0)
+    args = parser.parse_args()
+    print(
+        f'{"size":>8} {"method":<22} {"rows":>9} {"wall s":>8} '
+        f'{"pages":>6} {"pages/s":>8} {"records/s":>10} {"peak MB":>8}'
+        )
+    for size in args.sizes:
+        for r in bench(size, args.methods, args.max_workers, args.latency):
+            print(
+                f'{r["size"]:>8} {r["method"]:<22} {r["rows"]:>9} '
+                f'{r["wall"]:>8.2f} {r["pages"]:>6} '
+                f'{r["pages_per_sec"]:>8.1f} {r["records_per_sec"]:>10.0f} '
+                f'{r["rss"]:>8.1f}'
+                )
@@ -1,7 +1,1065 @@
-import pandas as pd
+from __future__ import annotations
 import os
+import sys
+import csv
+import json
+import hashlib
+import sqlite3
+import pickle
+import shutil
+import threading
+import time
+import random
+import uuid
+import warnings
+import importlib
+import importlib.util
+from collections import OrderedDict, deque
+from concurrent.futures import (
+    Future, ProcessPoolExecutor, ThreadPoolExecutor
+    )
+from functools import partial
+import multiprocessing
+from queue import Queue
+from argparse import ArgumentParser
+from itertools import chain, islice
+from email.utils import parsedate_to_datetime
 import requests
+from requests.adapters import HTTPAdapter
 from datetime import datetime, timedelta
+try:
+    import orjson
+    _json_loads = orjson.loads
+    _json_dumps = orjson.dumps
+except ImportError:  # fall back to the stdlib parser
+    _json_loads = json.loads
+
+    def _json_dumps(obj) -> bytes:
+        return json.dumps(obj, separators=(',', ':')).encode()
+
+
+class _lazy_module():
+    """Stand-in for a module that is imported on first attribute access,
+    so importing blaze_retail_api does not pay for pandas, numpy, aiohttp
+    or pyarrow until they are actually used."""
+
+    def __init__(self, name: str) -> None:
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr: str):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attr)
+
+
+def _optional_module(name: str):
+    """Lazy module if it is installed, else None."""
+    if importlib.util.find_spec(name.split('.')[0]) is None:
+        return None
+    return _lazy_module(name)
+
+
+pd = _lazy_module('pandas')
+np = _lazy_module('numpy')
+asyncio = _lazy_module('asyncio')
+aiohttp = _optional_module('aiohttp')  # async client is optional
+pa = _optional_module('pyarrow')  # dataset_sink is optional
+pq = _optional_module('pyarrow.parquet')
+
+BASE_URL = 'https://api.partners.blaze.me/api/v1/partner'
+OUTPUTS = ('frame', 'records', 'ndjson')
+# endpoints with an iter_* method, and those of them filtered by date
+EXPORT_ENDPOINTS = (
+    'products', 'vendors', 'brands', 'categories', 'curr_inventory',
+    'members', 'employees', 'item_sales', 'transactions',
+    'purchase_orders', 'po_line_items'
+    )
+DATED_ENDPOINTS = (
+    'members', 'item_sales', 'transactions', 'purchase_orders',
+    'po_line_items'
+    )
+PATHS = {
+    'products': '/products',
+    'vendors': '/vendors',
+    'categories': '/store/inventory/categories',
+    'brands': '/store/inventory/brands',
+    'inventories': '/store/inventory/inventories',
+    'batch_quantities': '/store/batches/quantities',
+    'members': '/members',
+    'employees': '/employees',
+    'transactions': '/transactions',
+    'purchase_orders': '/purchaseorders/list'
+    }
+
+
+# seconds reference endpoints stay cached when a cache is configured
+CACHE_TTLS = {
+    'products': 15 * 60,
+    'vendors': 60 * 60,
+    'brands': 60 * 60,
+    'categories': 60 * 60
+    }
+
+# parent keys carried onto each line when line item fields are projected
+ITEM_SALES_PARENT_FIELDS = {
+    'transactionId': 'id',
+    'transNo': 'transNo',
+    'memberId': 'memberId',
+    'processedTime': 'processedTime',
+    'transactionCreated': 'created'
+    }
+PO_LINE_PARENT_FIELDS = {
+    'purchaseOrderId': 'id',
+    'poNumber': 'poNumber',
+    'vendorId': 'vendorId',
+    'purchaseOrderCreated': 'created'
+    }
+
+# compact dtypes per returned frame, applied to the columns present.
+# Columns not listed are inferred by compact_frame.
+SCHEMAS = {
+    'products': {
+        'id': 'string', 'sku': 'string', 'name': 'string',
+        'categoryId': 'category', 'brandId': 'category',
+        'vendorId': 'category', 'shopId': 'category',
+        'companyId': 'category', 'flowerType': 'category',
+        'weightPerUnit': 'category', 'unitPrice': 'float',
+        'active': 'bool', 'deleted': 'bool',
+        'created': 'datetime', 'modified': 'datetime'
+        },
+    'vendors': {
+        'id': 'string', 'vendor_name': 'string', 'companyId': 'category',
+        'vendorType': 'category', 'active': 'bool', 'deleted': 'bool',
+        'created': 'datetime', 'modified': 'datetime'
+        },
+    'brands': {
+        'id': 'string', 'name': 'string', 'companyId': 'category',
+        'active': 'bool', 'deleted': 'bool',
+        'created': 'datetime', 'modified': 'datetime'
+        },
+    'categories': {
+        'id': 'string', 'name': 'string', 'shopId': 'category',
+        'companyId': 'category', 'unitType': 'category',
+        'active': 'bool', 'deleted': 'bool',
+        'created': 'datetime', 'modified': 'datetime'
+        },
+    'curr_inventory': {
+        'id': 'string', 'batchId': 'string', 'productId': 'category',
+        'inventoryId': 'category', 'shopId': 'category',
+        'companyId': 'category', 'quantity': 'float',
+        'created': 'datetime', 'modified': 'datetime'
+        },
+    'members': {
+        'id': 'string', 'firstName': 'string', 'lastName': 'string',
+        'email': 'string', 'primaryPhone': 'string',
+        'status': 'category', 'consumerType': 'category',
+        'shopId': 'category', 'companyId': 'category',
+        'loyaltyPoints': 'float', 'dob': 'datetime',
+        'startDate': 'datetime', 'lastVisitDate': 'datetime',
+        'created': 'datetime', 'modified': 'datetime'
+        },
+    'employees': {
+        'id': 'string', 'firstName': 'string', 'lastName': 'string',
+        'email': 'string', 'roleId': 'category', 'shopId': 'category',
+        'companyId': 'category', 'disabled': 'bool', 'deleted': 'bool',
+        'created': 'datetime', 'modified': 'datetime'
+        },
+    'transactions': {
+        'id': 'string', 'transNo': 'string', 'memberId': 'string',
+        'status': 'category', 'transType': 'category',
+        'queueType': 'category', 'sellerId': 'category',
+        'terminalId': 'category', 'shopId': 'category',
+        'companyId': 'category', 'cart.total': 'float',
+        'cart.subTotal': 'float', 'cart.totalDiscount': 'float',
+        'cart.taxResult.totalPostCalcTax': 'float',
+        'processedTime': 'datetime', 'completedTime': 'datetime',
+        'created': 'datetime', 'modified': 'datetime'
+        },
+    'item_sales': {
+        'transactionId': 'category', 'id': 'string',
+        'productId': 'category', 'batchId': 'category',
+        'prepackageItemId': 'category', 'status': 'category',
+        'shopId': 'category', 'companyId': 'category',
+        'quantity': 'float', 'cost': 'float', 'unitPrice': 'float',
+        'discount': 'float', 'finalPrice': 'float',
+        'created': 'datetime', 'modified': 'datetime'
+        },
+    'purchase_orders': {
+        'id': 'string', 'poNumber': 'string', 'vendorId': 'category',
+        'purchaseOrderStatus': 'category', 'poPaymentTerms': 'category',
+        'shopId': 'category', 'companyId': 'category',
+        'totalCost': 'float', 'grandTotal': 'float',
+        'receivedDate': 'datetime', 'completedDate': 'datetime',
+        'created': 'datetime', 'modified': 'datetime'
+        },
+    'po_line_items': {
+        'purchaseOrderId': 'category', 'id': 'string',
+        'productId': 'category', 'batchId': 'category',
+        'shopId': 'category', 'companyId': 'category',
+        'requestQuantity': 'float', 'receivedQuantity': 'float',
+        'unitPrice': 'float', 'totalCost': 'float',
+        'created': 'datetime', 'modified': 'datetime'
+        }
+    }
+
+# epoch ms fields converted to datetime64 wherever they appear
+TIMESTAMP_FIELDS = ('created', 'modified', 'processedTime', 'completedTime')
+# catalog table -> {source field: column attached by catalog_index.enrich}
+CATALOG_FIELDS = {
+    'products': {
+        'name': 'product_name',
+        'sku': 'product_sku',
+        'flowerType': 'product_flowerType',
+        'unitPrice': 'product_unitPrice',
+        'categoryId': 'product_categoryId',
+        'brandId': 'product_brandId',
+        'vendorId': 'product_vendorId'
+        },
+    'brands': {'name': 'brand_name'},
+    'vendors': {'name': 'vendor_name'},
+    'categories': {
+        'name': 'category_name', 'unitType': 'category_unitType'
+        }
+    }
+
+
+def _to_epoch_ms(date: str) -> int:
+    """Convert a '%m/%d/%Y' (or '%m/%d/%Y %H:%M') date to the epoch
+    milliseconds BLAZE expects.
+
+    Args:
+        date (str): date as '%m/%d/%Y' or '%m/%d/%Y %H:%M'.
+
+    Returns:
+        int: epoch timestamp in milliseconds.
+    """
+    epoch_offset = 1000  # offset for datetime for BLAZE TS format
+    fmt = '%m/%d/%Y %H:%M' if ' ' in date else '%m/%d/%Y'
+    return int(datetime.strptime(date, fmt).timestamp() * epoch_offset)
+
+
+def _shard_windows(start_date: str, end_date: str, shard: str) -> list:
+    """Split a '%m/%d/%Y' window into consecutive day or hour windows.
+    Hour windows are formatted '%m/%d/%Y %H:%M'.
+
+    Args:
+        start_date (str): window start.
+        end_date (str): window end.
+        shard (str): 'day' or 'hour'.
+
+    Returns:
+        list: (start_date, end_date) tuples covering the window.
+    """
+    steps = {'day': timedelta(days=1), 'hour': timedelta(hours=1)}
+    if shard not in steps:
+        raise ValueError(f'Unknown shard size: {shard}')
+    fmt = '%m/%d/%Y' if shard == 'day' else '%m/%d/%Y %H:%M'
+    start = datetime.strptime(start_date, '%m/%d/%Y')
+    end = datetime.strptime(end_date, '%m/%d/%Y')
+    windows = []
+    while start < end:
+        windows.append((
+            start.strftime(fmt), min(start + steps[shard], end).strftime(fmt)
+            ))
+        start += steps[shard]
+    return windows or [(start_date, end_date)]
+
+
+def _normalize(records: list) -> pd.DataFrame:
+    """Flat frame of nested raw records (pd.json_normalize)."""
+    return pd.json_normalize(records)
+
+
+def _from_records(records: list) -> pd.DataFrame:
+    """Frame of flat raw records, one column per top-level key."""
+    return pd.DataFrame.from_records(records)
+
+
+def _vendors_frame(records: list) -> pd.DataFrame:
+    """Build the vendors frame from raw vendor records."""
+    return pd.DataFrame().from_records(records).rename(
+        columns={
+            'name': 'vendor_name'
+            }
+        ).drop_duplicates('id')
+
+
+def _vendors_rows(records: list) -> list:
+    """Records-mode counterpart of _vendors_frame."""
+    vendors = {}
+    for record in records:
+        vendors.setdefault(record.get('id'), record)
+    return [
+        {'vendor_name' if k == 'name' else k: v for k, v in record.items()}
+        for record in vendors.values()
+        ]
+
+
+def _modified_ms(record: dict) -> int:
+    """Last modified epoch ms of a raw record, falling back to created."""
+    return record.get('modified') or record.get('created') or 0
+
+
+def _smallest_int(values: pd.Series) -> pd.Series:
+    """Downcast integers to the smallest nullable integer dtype."""
+    values = pd.to_numeric(values, errors='coerce')
+    if values.isna().all():
+        return values.astype('Int8')
+    lo, hi = values.min(), values.max()
+    for dtype in ('Int8', 'Int16', 'Int32', 'Int64'):
+        info = np.iinfo(dtype.lower())
+        if info.min <= lo and hi <= info.max:
+            return values.astype(dtype)
+    return values.astype('Float64')
+
+
+def _convert(values: pd.Series, kind: str) -> pd.Series:
+    """Convert a column to the dtype named by a SCHEMAS kind."""
+    if kind == 'datetime':
+        return pd.to_datetime(
+            pd.to_numeric(values, errors='coerce'), unit='ms'
+            )
+    if kind == 'category':
+        return values.astype('category')
+    if kind == 'string':
+        return values.astype('string')
+    if kind == 'int':
+        return _smallest_int(values)
+    if kind == 'float':
+        return pd.to_numeric(values, errors='coerce').astype('float64')
+    if kind == 'bool':
+        return values.astype('boolean')
+    raise ValueError(f'Unknown dtype kind: {kind}')
+
+
+def _infer_kind(name: str, values: pd.Series) -> str:
+    """Pick a compact dtype kind for a column not listed in a schema."""
+    if name.split('.')[-1] in TIMESTAMP_FIELDS and\
+            pd.api.types.is_numeric_dtype(values):
+        return 'datetime'
+    if pd.api.types.is_bool_dtype(values):
+        return None
+    if pd.api.types.is_integer_dtype(values):
+        return 'int'
+    if pd.api.types.is_numeric_dtype(values):
+        return None
+    inferred = pd.api.types.infer_dtype(values, skipna=True)
+    if inferred == 'boolean':
+        return 'bool'
+    if inferred == 'string':
+        if values.nunique() <= len(values) // 2:
+            return 'category'
+        return 'string'
+    return None
+
+
+def compact_frame(
+        dat: pd.DataFrame,
+        schema: dict = None,
+        columns: list = None
+        ) -> pd.DataFrame:
+    """Convert a frame to compact dtypes: categoricals for repeated
+    strings, datetime64 for BLAZE epoch ms, the smallest nullable integer
+    types and nullable booleans. Columns in schema use its kind ('string',
+    'category', 'datetime', 'int', 'float', 'bool'); others are inferred.
+    Nested lists and dicts are left as they are.
+
+    Args:
+        dat (pd.DataFrame): frame to convert.
+        schema (dict, optional): column -> kind. Defaults to None.
+        columns (list, optional): columns to keep. Defaults to None (all).
+
+    Returns:
+        pd.DataFrame: converted frame.
+    """
+    if columns is not None:
+        dat = dat[[col for col in columns if col in dat.columns]]
+    schema = schema or {}
+    converted = {}
+    for col in dat.columns:
+        kind = schema.get(col) or _infer_kind(col, dat[col])
+        converted[col] = dat[col] if kind is None else _convert(
+            dat[col], kind
+            )
+    return pd.DataFrame(converted, index=dat.index)
+
+
+def _flatten(pages) -> list:
+    """Concatenate pages of raw records into a single list."""
+    return [record for page in pages for record in page]
+
+
+def to_ndjson(records: list) -> bytes:
+    """Serialise records as newline-delimited JSON, one record per line.
+
+    Args:
+        records (list): JSON-serialisable records.
+
+    Returns:
+        bytes: NDJSON document (empty for no records).
+    """
+    return b''.join(_json_dumps(record) + b'\n' for record in records)
+
+
+def _flat_row(record: dict, prefix: str = '') -> dict:
+    """One flat row of a nested raw record: nested dicts become dotted
+    columns and lists are kept as JSON text."""
+    row = {}
+    for key, value in record.items():
+        if isinstance(value, dict):
+            row.update(_flat_row(value, f'{prefix}{key}.'))
+        elif isinstance(value, list):
+            row[prefix + key] = _json_dumps(value).decode()
+        else:
+            row[prefix + key] = value
+    return row
+
+
+def _parse_page(content: bytes, parse, loads=_json_loads):
+    """Decode a raw page body with loads and parse its records. Runs in
+    the parse worker processes, so parse and loads must be picklable (a
+    module-level function or a partial of one)."""
+    return parse(loads(content).get('values') or [])
+
+
+def _counted(parse, records: list) -> tuple:
+    """(nbr of records, parse(records)), so page-parsed results keep the
+    raw record count."""
+    return len(records), parse(records)
+
+
+def _concat(frames: list) -> pd.DataFrame:
+    """One frame from frames parsed page by page."""
+    return pd.concat(frames, ignore_index=True) if frames\
+        else pd.DataFrame()
+
+
+def _without(records: list, path: str) -> list:
+    """Copies of raw records with the dotted path removed, e.g.
+    'cart.items'; the records-mode counterpart of dropping a column."""
+    *parents, key = path.split('.')
+
+    def drop(record: dict, keys: list) -> dict:
+        if not isinstance(record, dict):
+            return record
+        if not keys:
+            return {k: v for k, v in record.items() if k != key}
+        if keys[0] not in record:
+            return record
+        return {**record, keys[0]: drop(record[keys[0]], keys[1:])}
+    return [drop(record, parents) for record in records]
+
+
+def _path_getter(path: str):
+    """Getter for a dotted path into nested dicts, e.g. 'cart.items'.
+    Missing keys give None."""
+    keys = path.split('.')
+    if len(keys) == 1:
+        key = keys[0]
+        return lambda record: record.get(key)
+
+    def get(record):
+        for key in keys:
+            if not isinstance(record, dict):
+                return None
+            record = record.get(key)
+        return record
+    return get
+
+
+def _extract(records: list, path: str) -> list:
+    """Values of a dotted path across records, as one list."""
+    if '.' not in path:
+        return [record.get(path) for record in records]
+    values = records
+    for key in path.split('.'):
+        try:
+            values = [value.get(key) for value in values]
+        except AttributeError:
+            # a missing or non-dict parent somewhere along the path
+            values = [
+                value.get(key) if isinstance(value, dict) else None
+                for value in values
+                ]
+    return values
+
+
+def flatten_lines(
+        records: list,
+        items_path: str,
+        fields: list,
+        parent_fields: dict = None,
+        arrays: bool = True
+        ) -> dict:
+    """Flatten the line items nested in parent records into column arrays
+    in one pass, extracting only the fields asked for. Much cheaper than
+    json_normalize + explode when most of the payload is not needed.
+
+    Args:
+        records (list): raw parent records (transactions, POs).
+        items_path (str): dotted path of the item list in each parent.
+        fields (list): dotted item paths to extract, e.g. 'productId' or
+            'taxResult.totalPostCalcTax'. Used as column names.
+        parent_fields (dict, optional): column name -> dotted parent path
+            copied onto each of its lines. Defaults to None.
+        arrays (bool, optional): repeat parent columns as typed pandas
+            arrays (fast to load into a DataFrame) rather than lists.
+            Defaults to True.
+
+    Returns:
+        dict: column name -> values (list or pandas array), one entry
+        per line item.
+    """
+    nested = [
+        record_items if isinstance(record_items, list) else []
+        for record_items in _extract(records, items_path)
+        ]
+    items = list(chain.from_iterable(nested))
+    parents = [record for record, lines in zip(records, nested) if lines]
+    counts = [len(lines) for lines in nested if lines]
+
+    columns = {}
+    lines = None
+    for name, path in (parent_fields or {}).items():
+        # extracted once per parent, then repeated onto its lines
+        if not arrays:
+            columns[name] = [
+                value
+                for value, count in zip(_extract(parents, path), counts)
+                for _ in range(count)
+                ]
+            continue
+        if lines is None:
+            lines = np.repeat(np.arange(len(parents)), counts)
+        # typed once per parent (int64, float64, str...) and taken per line
+        columns[name] = pd.Series(_extract(parents, path)).array.take(lines)
+    for field in fields:
+        columns[field] = _extract(items, field)
+    return columns
+
+
+def _rows(columns: dict) -> list:
+    """Turn column arrays back into a list of row dicts."""
+    names = list(columns)
+    return [dict(zip(names, row)) for row in zip(*columns.values())]
+
+
+def _item_sales_records(
+        records: list,
+        fields: list = None,
+        parent_fields: dict = None
+        ) -> list:
+    """Explode raw transaction records into their cart line items,
+    tagging each item with the id of its transaction. With fields, only
+    those item fields plus parent_fields (ITEM_SALES_PARENT_FIELDS by
+    default) are kept."""
+    if fields is not None:
+        return _rows(
+            _item_sales_columns(records, fields, parent_fields, arrays=False)
+            )
+    return [
+        {'transactionId': transaction.get('id'), **item}
+        for transaction in records
+        for item in (transaction.get('cart') or {}).get('items') or []
+        ]
+
+
+def _item_sales_columns(
+        records: list,
+        fields: list,
+        parent_fields: dict = None,
+        arrays: bool = True
+        ) -> dict:
+    """Projected line item columns of raw transaction records."""
+    return flatten_lines(
+        records, 'cart.items', fields,
+        ITEM_SALES_PARENT_FIELDS if parent_fields is None else parent_fields,
+        arrays
+        )
+
+
+def _item_sales_frame(
+        records: list,
+        fields: list = None,
+        parent_fields: dict = None
+        ) -> pd.DataFrame:
+    """Build the line item sales frame from raw transaction records."""
+    if fields is not None:
+        return pd.DataFrame(
+            _item_sales_columns(records, fields, parent_fields)
+            )
+    return pd.DataFrame(_item_sales_records(records))
+
+
+def _po_line_items_records(
+        records: list,
+        fields: list = None,
+        parent_fields: dict = None
+        ) -> list:
+    """Explode raw purchase order records into their line items,
+    tagging each item with the id of its purchase order. With fields, only
+    those item fields plus parent_fields (PO_LINE_PARENT_FIELDS by
+    default) are kept."""
+    if fields is not None:
+        return _rows(_po_line_items_columns(
+            records, fields, parent_fields, arrays=False
+            ))
+    return [
+        {'purchaseOrderId': po.get('id'), **item}
+        for po in records
+        for item in po.get('poProductRequestResultList') or []
+        ]
+
+
+def _po_line_items_columns(
+        records: list,
+        fields: list,
+        parent_fields: dict = None,
+        arrays: bool = True
+        ) -> dict:
+    """Projected line item columns of raw purchase order records."""
+    return flatten_lines(
+        records, 'poProductRequestResultList', fields,
+        PO_LINE_PARENT_FIELDS if parent_fields is None else parent_fields,
+        arrays
+        )
+
+
+def _po_line_items_frame(
+        records: list,
+        fields: list = None,
+        parent_fields: dict = None
+        ) -> pd.DataFrame:
+    """Build the PO line items frame from raw purchase order records."""
+    if fields is not None:
+        return pd.DataFrame(
+            _po_line_items_columns(records, fields, parent_fields)
+            )
+    return pd.DataFrame(_po_line_items_records(records))
+
+
+class memory_cache():
+    """In-memory LRU cache with a per-entry TTL. Safe to share across
+    threads and clients.
+    """
+
+    def __init__(self, maxsize: int = 128) -> None:
+        """
+        Args:
+            maxsize (int, optional): max nbr of entries kept.
+                Defaults to 128.
+        """
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Cached value for key, or None if missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl: float) -> None:
+        """Cache value under key for ttl seconds."""
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drop every entry."""
+        with self._lock:
+            self._entries.clear()
+
+
+class disk_cache():
+    """On-disk cache with a per-entry TTL, one pickle file per key.
+    Survives restarts, so separate scripts can share catalog pulls.
+    """
+
+    def __init__(self, directory: str = '.blaze_cache') -> None:
+        """
+        Args:
+            directory (str, optional): where cache files are written.
+                Defaults to '.blaze_cache'.
+        """
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key) -> str:
+        digest = hashlib.sha256(repr(key).encode()).hexdigest()
+        return os.path.join(self.directory, f'{digest}.pkl')
+
+    def get(self, key):
+        """Cached value for key, or None if missing or expired."""
+        try:
+            with open(self._path(key), 'rb') as f:
+                expires, value = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return None
+        if expires < time.time():
+            return None
+        return value
+
+    def set(self, key, value, ttl: float) -> None:
+        """Cache value under key for ttl seconds."""
+        path = self._path(key)
+        tmp = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(tmp, 'wb') as f:
+            pickle.dump((time.time() + ttl, value), f)
+        os.replace(tmp, path)
+
+    def clear(self) -> None:
+        """Drop every entry."""
+        for name in os.listdir(self.directory):
+            if name.endswith('.pkl'):
+                os.remove(os.path.join(self.directory, name))
+
+
+def _retry_after(headers) -> float:
+    """Seconds to wait from a Retry-After header (delta or HTTP date).
+
+    Args:
+        headers (Mapping): response headers.
+
+    Returns:
+        float: seconds to wait, or None if the header is missing/invalid.
+    """
+    value = (headers or {}).get('Retry-After')
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when.timestamp() - time.time())
+
+
+class request_scheduler():
+    """Central gate for every request of one or more clients: a token
+    bucket rate limit, retries with exponential backoff, full jitter and
+    Retry-After handling, and AIMD concurrency (halved on every throttled
+    response, grown by one after a window of successes).
+    Each page is retried on its own, so one 429 or 503 mid-pagination does
+    not throw away the pages already fetched.
+    """
+
+    RETRY_STATUSES = (429, 500, 502, 503, 504)
+    THROTTLE_STATUSES = (429, 503)
+
+    def __init__(
+            self,
+            rate: float = None,
+            burst: int = None,
+            max_retries: int = 5,
+            backoff: float = 0.5,
+            max_backoff: float = 60,
+            max_concurrency: int = 16,
+            min_concurrency: int = 1
+            ) -> None:
+        """
+        Args:
+            rate (float, optional): sustained requests per second.
+                Defaults to None (no rate limit).
+            burst (int, optional): requests allowed at once above rate.
+                Defaults to max(1, rate).
+            max_retries (int, optional): retries per request.
+                Defaults to 5.
+            backoff (float, optional): base backoff in seconds, doubled per
+                retry. Defaults to 0.5.
+            max_backoff (float, optional): backoff cap in seconds.
+                Defaults to 60.
+            max_concurrency (int, optional): max requests in flight.
+                Defaults to 16.
+            min_concurrency (int, optional): floor the concurrency is
+                lowered to under throttling. Defaults to 1.
+        """
+        self.rate = rate
+        self.burst = burst or max(1, int(rate or 1))
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.concurrency = max_concurrency
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._resume_at = 0.0
+        self._in_flight = 0
+        self._successes = 0
+        self._cond = threading.Condition()
+
+    def wait_time(self) -> float:
+        """Take a token and return the seconds to wait before sending,
+        including any pause requested by a Retry-After header.
+
+        Returns:
+            float: seconds to wait.
+        """
+        with self._cond:
+            now = time.monotonic()
+            wait = max(0.0, self._resume_at - now)
+            if self.rate is None:
+                return wait
+            self._tokens = min(
+                self.burst, self._tokens + (now - self._updated) * self.rate
+                )
+            self._updated = now
+            self._tokens -= 1
+            if self._tokens < 0:
+                wait = max(wait, -self._tokens / self.rate)
+            return wait
+
+    def retry_delay(self, attempt: int, headers=None) -> float:
+        """Backoff before retry nbr attempt (0-based): full jitter over an
+        exponential ceiling, but never shorter than Retry-After. A
+        Retry-After also pauses every other request through this scheduler.
+
+        Args:
+            attempt (int): nbr of retries already made.
+            headers (Mapping, optional): headers of the failed response.
+                Defaults to None.
+
+        Returns:
+            float: seconds to wait.
+        """
+        delay = random.uniform(
+            0, min(self.max_backoff, self.backoff * 2 ** attempt)
+            )
+        retry_after = _retry_after(headers)
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+            with self._cond:
+                self._resume_at = max(
+                    self._resume_at, time.monotonic() + retry_after
+                    )
+        return delay
+
+    def record(self, throttled: bool) -> None:
+        """Adjust concurrency after a response: halve it on throttling,
+        add one after a full window of successes.
+
+        Args:
+            throttled (bool): whether the response was a 429/503.
+        """
+        with self._cond:
+            if throttled:
+                self.concurrency = max(
+                    self.min_concurrency, self.concurrency // 2
+                    )
+                self._successes = 0
+            else:
+                self._successes += 1
+                if self._successes >= self.concurrency and\
+                        self.concurrency < self.max_concurrency:
+                    self.concurrency += 1
+                    self._successes = 0
+            self._cond.notify_all()
+
+    def _acquire(self) -> None:
+        with self._cond:
+            while self._in_flight >= self.concurrency:
+                self._cond.wait()
+            self._in_flight += 1
+
+    def _release(self) -> None:
+        with self._cond:
+            self._in_flight -= 1
+            self._cond.notify_all()
+
+    def request(
+            self,
+            send,
+            *args,
+            on_retry=None,
+            **kwargs
+            ) -> requests.Response:
+        """Send a request through the rate limit and concurrency gate,
+        retrying connection errors and retryable statuses.
+
+        Args:
+            send (callable): e.g. session.get.
+            *args, **kwargs: passed to send.
+            on_retry (callable, optional): called as on_retry(attempt,
+                status, delay) before each retry; status is None after a
+                connection error. Defaults to None.
+
+        Raises:
+            requests.ConnectionError, requests.Timeout: once retries are
+                exhausted.
+
+        Returns:
+            requests.Response: the first non-retryable response, or the
+            last one once retries are exhausted.
+        """
+        attempt = 0
+        while True:
+            time.sleep(self.wait_time())
+            self._acquire()
+            try:
+                response = send(*args, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt >= self.max_retries:
+                    raise
+                response = None
+            finally:
+                self._release()
+            if response is None:
+                delay = self.retry_delay(attempt)
+            else:
+                self.record(response.status_code in self.THROTTLE_STATUSES)
+                if response.status_code not in self.RETRY_STATUSES or\
+                        attempt >= self.max_retries:
+                    return response
+                delay = self.retry_delay(attempt, response.headers)
+            if on_retry is not None:
+                on_retry(
+                    attempt,
+                    None if response is None else response.status_code,
+                    delay
+                    )
+            time.sleep(delay)
+            attempt += 1
+
+
+class request_metrics():
+    """Hook that aggregates client events into per-endpoint counters,
+    request latency histograms and per-phase timings: network (send to
+    body received), decode (JSON parsing), normalize (building frames) and
+    retry_wait (backoff sleeps). Pass it in hooks= and read summary().
+    Normalize time is keyed by frame name (e.g. item_sales), the other
+    phases by endpoint (e.g. transactions).
+    """
+
+    BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+    COUNTERS = (
+        'requests', 'errors', 'retries', 'throttles', 'pages', 'records',
+        'bytes'
+        )
+    PHASES = ('network', 'decode', 'normalize', 'retry_wait')
+
+    def __init__(self, buckets: tuple = None) -> None:
+        """
+        Args:
+            buckets (tuple, optional): histogram upper bounds in seconds;
+                slower requests fall in a final +inf bucket.
+                Defaults to BUCKETS.
+        """
+        self.buckets = tuple(buckets or self.BUCKETS)
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        """Drop everything aggregated so far."""
+        with self._lock:
+            self._stats = {}
+
+    def _endpoint(self, endpoint: str) -> dict:
+        stats = self._stats.get(endpoint)
+        if stats is None:
+            stats = self._stats[endpoint] = {
+                **dict.fromkeys(self.COUNTERS, 0),
+                **dict.fromkeys(self.PHASES, 0.0),
+                'max_latency': 0.0,
+                'histogram': [0] * (len(self.buckets) + 1)
+                }
+        return stats
+
+    def __call__(self, event: str, info: dict) -> None:
+        """Aggregate one event emitted by blaze_retail_api.
+
+        Args:
+            event (str): event name, see blaze_retail_api.
+            info (dict): event attributes.
+        """
+        with self._lock:
+            stats = self._endpoint(info.get('endpoint'))
+            if event == 'request_end':
+                latency = info['latency']
+                stats['requests'] += 1
+                stats['errors'] += info.get('status') != 200
+                stats['bytes'] += info.get('bytes') or 0
+                stats['network'] += latency
+                stats['max_latency'] = max(stats['max_latency'], latency)
+                stats['histogram'][
+                    sum(latency > bound for bound in self.buckets)
+                    ] += 1
+            elif event == 'page_parsed':
+                stats['pages'] += 1
+                stats['records'] += info.get('records') or 0
+                stats['decode'] += info['latency']
+            elif event == 'frame_built':
+                stats['normalize'] += info['latency']
+            elif event == 'retry':
+                stats['retries'] += 1
+                stats['retry_wait'] += info.get('delay') or 0.0
+            elif event == 'throttle':
+                stats['throttles'] += 1
+
+    def histogram(self, endpoint: str = None) -> dict:
+        """Request latency histogram.
+
+        Args:
+            endpoint (str, optional): key of PATHS. Defaults to None (all
+                endpoints).
+
+        Returns:
+            dict: bucket upper bound in seconds -> nbr of requests.
+        """
+        with self._lock:
+            counts = [0] * (len(self.buckets) + 1)
+            for name, stats in self._stats.items():
+                if endpoint is None or name == endpoint:
+                    counts = [
+                        a + b for a, b in zip(counts, stats['histogram'])
+                        ]
+        return dict(zip(self.buckets + (float('inf'),), counts))
+
+    def phases(self) -> dict:
+        """Seconds spent in each phase, summed over every endpoint and
+        thread (so they can exceed wall time when pages are fetched
+        concurrently).
+
+        Returns:
+            dict: phase -> seconds.
+        """
+        with self._lock:
+            return {
+                phase: sum(stats[phase] for stats in self._stats.values())
+                for phase in self.PHASES
+                }
+
+    def summary(self) -> pd.DataFrame:
+        """Per-endpoint counters, phase timings and latency stats.
+
+        Returns:
+            pd.DataFrame: one row per endpoint.
+        """
+        with self._lock:
+            rows = [
+                {
+                    'endpoint': name,
+                    **{key: stats[key] for key in self.COUNTERS + self.PHASES},
+                    'mean_latency': stats['network'] / stats['requests']
+                    if stats['requests'] else None,
+                    'max_latency': stats['max_latency']
+                    }
+                for name, stats in self._stats.items()
+                ]
+        return pd.DataFrame(rows)
 
 
 class blaze_retail_api():
@@ -9,19 +1067,2995 @@ class blaze_retail_api():
     def __init__(
             self,
             partner_key=os.getenv('blz_partner_key'),
-            Authorization=os.getenv('blz_api_key')
+            Authorization=os.getenv('blz_api_key'),
+            base_url: str = BASE_URL,
+            pool_connections: int = 10,
+            pool_maxsize: int = 10,
+            timeout: tuple = (5, 60),
+            cache=None,
+            cache_ttls: dict = None,
+            scheduler: request_scheduler = None,
+            compact_dtypes: bool = False,
+            columns: dict = None,
+            json_loads=None,
+            hooks: list = None,
+            output: str = 'frame',
+            parse_processes: int = None,
+            memo_ttl: float = 0
+            ) -> None:
+        """
+        Args:
+            partner_key (str, optional): BLAZE partner key.
+                Defaults to env var blz_partner_key.
+            Authorization (str, optional): BLAZE API key.
+                Defaults to env var blz_api_key.
+            base_url (str, optional): partner API root, e.g. a local mock
+                server. Defaults to BASE_URL.
+            pool_connections (int, optional): nbr of connection pools to
+                cache. Defaults to 10.
+            pool_maxsize (int, optional): max nbr of keep-alive connections
+                per pool. Defaults to 10.
+            timeout (tuple, optional): (connect, read) timeout in seconds
+                for every request. Defaults to (5, 60).
+            cache (memory_cache | disk_cache, optional): cache for reference
+                endpoints (products, vendors, brands, categories).
+                Defaults to None (no caching).
+            cache_ttls (dict, optional): seconds to keep each endpoint in
+                cache. Defaults to CACHE_TTLS.
+            scheduler (request_scheduler, optional): rate limit, retry and
+                concurrency policy; can be shared by several clients.
+                Defaults to request_scheduler() (retries, no rate limit).
+            compact_dtypes (bool, optional): convert returned frames to
+                compact dtypes with SCHEMAS (see compact_frame).
+                Defaults to False.
+            columns (dict, optional): frame name -> columns to keep, e.g.
+                {'item_sales': ['transactionId', 'productId', 'quantity']}.
+                Defaults to None (keep all).
+            json_loads (callable, optional): parser for response bodies
+                (bytes -> object). Defaults to orjson.loads when installed,
+                else json.loads.
+            hooks (list, optional): callables invoked as hook(event, info)
+                for every instrumentation event, e.g. request_metrics().
+                Defaults to None.
+            output (str, optional): what get_* methods return: 'frame'
+                (pandas DataFrames), 'records' (lists of dicts) or
+                'ndjson' (bytes). Records are the raw, nested payloads
+                (e.g. {'cart': {'total': ...}}, not 'cart.total'), except
+                for item sales and PO line items, which get one dict per
+                line like their frames. Projected columns are read as
+                dotted paths into them. 'records' and 'ndjson' never
+                import pandas. Defaults to 'frame'.
+            parse_processes (int, optional): nbr of worker processes that
+                decode and flatten pages for unsharded get_transactions,
+                get_item_sales, get_purchase_orders and get_po_line_items
+                frames, while the fetch threads keep downloading.
+                json_loads is sent to the workers, so it must then be
+                picklable. Defaults to None (parse on the calling threads).
+            memo_ttl (float, optional): seconds a fetched result is reused
+                by identical calls, to absorb bursts when the client is
+                shared by many threads. Identical calls already in flight
+                are always coalesced into one upstream fetch.
+                Defaults to 0 (no memo).
+
+        Events (info always carries 'endpoint'):
+            request_start: offset.
+            request_end: offset, status, latency (send to body received),
+                bytes, error (on connection errors).
+            retry: offset, attempt, status, delay.
+            throttle: offset, status, retry_after.
+            page_parsed: offset, latency (decode), bytes, records, total;
+                not emitted for pages decoded on the parse pool.
+            frame_built: latency (building the frame), records, rows.
+        Hooks run on the thread that made the request and should be fast.
+        """
+        try:
+            self.partner_key = partner_key
+            self.Authorization = Authorization
+        except Exception as e:
+            print(e)
+        assert not (self.partner_key is None or self.Authorization is None)
+        if output not in OUTPUTS:
+            raise ValueError(f'Unknown output: {output}')
+
+        self.base_url = base_url
+        self.output = output
+        self.timeout = timeout
+        self.session = self._make_session(pool_connections, pool_maxsize)
+        self.cache = cache
+        self.cache_ttls = CACHE_TTLS if cache_ttls is None else cache_ttls
+        self.scheduler = scheduler or request_scheduler()
+        self.compact_dtypes = compact_dtypes
+        self.columns = columns or {}
+        self.json_loads = json_loads or _json_loads
+        self.hooks = list(hooks or [])
+        self.parse_processes = parse_processes
+        self._endpoints = {self._url(name): name for name in PATHS}
+        self._inventories = None
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        self.memo_ttl = memo_ttl
+        self._flights = {}
+        self._memo = {}
+        self._flights_lock = threading.Lock()
+
+    @property
+    def inventories(self) -> dict:
+        """Inventory name -> id for the current shop, resolved on first use.
+        """
+        if self._inventories is None:
+            self._inventories = self._coalesced(('inventories',), lambda: {
+                record.get('name'): record.get('id')
+                for record in self._fetch_page(
+                    self._url('inventories')
+                    ).get('values') or []
+                })
+        return self._inventories
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Close the pooled session and its keep-alive connections, and
+        stop the parse worker processes."""
+        self.session.close()
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def _parse_pool(self) -> ProcessPoolExecutor:
+        """Worker processes for page parsing, started on first use.
+        Workers are spawned rather than forked, since the fetch threads
+        may hold locks at fork time.
+
+        Returns:
+            ProcessPoolExecutor: the parse pool.
+        """
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.parse_processes,
+                    mp_context=multiprocessing.get_context('spawn')
+                    )
+            return self._pool
+
+    def _make_session(
+            self,
+            pool_connections: int,
+            pool_maxsize: int
+            ) -> requests.Session:
+        """Build the keep-alive session shared by every endpoint call.
+        Auth headers are set once here instead of per request.
+
+        Args:
+            pool_connections (int): nbr of connection pools to cache.
+            pool_maxsize (int): max nbr of connections kept per pool.
+
+        Returns:
+            requests.Session: pooled session with auth and gzip headers.
+        """
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize
+            )
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        session.headers.update({
+            'partner_key': self.partner_key,
+            'Authorization': self.Authorization,
+            'Accept-Encoding': 'gzip, deflate',
+            'Connection': 'keep-alive'
+            })
+        return session
+
+    def _url(self, endpoint: str) -> str:
+        """Full url of a BLAZE partner endpoint.
+
+        Args:
+            endpoint (str): key of PATHS.
+
+        Returns:
+            str: endpoint url.
+        """
+        return self.base_url + PATHS[endpoint]
+
+    def add_hook(self, hook) -> None:
+        """Register an instrumentation hook, see __init__.
+
+        Args:
+            hook (callable): called as hook(event, info).
+        """
+        self.hooks.append(hook)
+
+    def _emit(self, event: str, **info) -> None:
+        """Send an event to every registered hook.
+
+        Args:
+            event (str): event name.
+            **info: event attributes.
+        """
+        for hook in self.hooks:
+            hook(event, info)
+
+    def _coalesced(self, key: tuple, fetch):
+        """Run fetch once for every identical call in flight: the first
+        caller fetches, the others wait for and share its result (or its
+        exception). With memo_ttl, the result is also reused by identical
+        calls for that many seconds. Shared results must not be mutated.
+
+        Args:
+            key (tuple): endpoint and the arguments that change the result.
+            fetch (callable): performs the upstream fetch.
+
+        Returns:
+            object: the fetched result.
+        """
+        with self._flights_lock:
+            now = time.monotonic()
+            memo = self._memo.get(key)
+            if memo is not None and memo[0] > now:
+                return memo[1]
+            future = self._flights.get(key)
+            leader = future is None
+            if leader:
+                future = self._flights[key] = Future()
+        if not leader:
+            return future.result()
+
+        try:
+            result = fetch()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+        finally:
+            with self._flights_lock:
+                del self._flights[key]
+                if self.memo_ttl and future.exception() is None:
+                    now = time.monotonic()
+                    self._memo = {
+                        k: memo for k, memo in self._memo.items()
+                        if memo[0] > now
+                        }
+                    self._memo[key] = (now + self.memo_ttl, result)
+        return result
+
+    def _cached(self, endpoint: str, fetch, *key) -> list:
+        """Return the raw records of a reference endpoint from cache, or
+        fetch and cache them for the endpoint's TTL. Concurrent identical
+        calls share one fetch.
+
+        Args:
+            endpoint (str): key of cache_ttls.
+            fetch (callable): returns the records on a cache miss.
+            *key: call arguments that change the result.
+
+        Returns:
+            list: raw records.
+        """
+        if self.cache is None or endpoint not in self.cache_ttls:
+            return self._coalesced((endpoint,) + key, fetch)
+        cache_key = (endpoint, self._shop_key()) + key
+
+        def fetch_and_cache() -> list:
+            records = fetch()
+            self.cache.set(cache_key, records, self.cache_ttls[endpoint])
+            return records
+
+        records = self.cache.get(cache_key)
+        if records is None:
+            records = self._coalesced((endpoint,) + key, fetch_and_cache)
+        return records
+
+    def _get(self, url: str, params: dict = None) -> requests.Response:
+        """Send a GET request through the pooled session and the
+        scheduler, which rate-limits it and retries throttled or failed
+        attempts. With hooks, every attempt emits request_start and
+        request_end, and throttles and retries are reported too.
+
+        Args:
+            url (str): endpoint url.
+            params (dict, optional): query params. Defaults to None.
+
+        Returns:
+            requests.Response: raw response.
+        """
+        if not self.hooks:
+            return self.scheduler.request(
+                self.session.get, url, params=params, timeout=self.timeout
+                )
+        endpoint = self._endpoints.get(url, url)
+        offset = (params or {}).get('skip', (params or {}).get('start'))
+
+        def send(*args, **kwargs) -> requests.Response:
+            self._emit('request_start', endpoint=endpoint, offset=offset)
+            start = time.perf_counter()
+            try:
+                response = self.session.get(*args, **kwargs)
+                size = len(response.content)
+            except requests.RequestException as e:
+                self._emit(
+                    'request_end', endpoint=endpoint, offset=offset,
+                    status=None, latency=time.perf_counter() - start,
+                    bytes=0, error=repr(e)
+                    )
+                raise
+            self._emit(
+                'request_end', endpoint=endpoint, offset=offset,
+                status=response.status_code,
+                latency=time.perf_counter() - start, bytes=size
+                )
+            if response.status_code in self.scheduler.THROTTLE_STATUSES:
+                self._emit(
+                    'throttle', endpoint=endpoint, offset=offset,
+                    status=response.status_code,
+                    retry_after=_retry_after(response.headers)
+                    )
+            return response
+
+        def on_retry(attempt: int, status: int, delay: float) -> None:
+            self._emit(
+                'retry', endpoint=endpoint, offset=offset, attempt=attempt,
+                status=status, delay=delay
+                )
+
+        return self.scheduler.request(
+            send, url, params=params, timeout=self.timeout,
+            on_retry=on_retry
+            )
+
+    def _fetch_page(
+            self,
+            url: str,
+            params: dict = None,
+            decode: bool = True
+            ) -> dict:
+        """Fetch and decode a single page.
+
+        Args:
+            url (str): endpoint url.
+            params (dict, optional): query params. Defaults to None.
+            decode (bool, optional): decode the body; False returns the
+                raw bytes. Defaults to True.
+
+        Raises:
+            requests.HTTPError: on any non-200 response.
+
+        Returns:
+            dict | bytes: decoded response body.
+        """
+        response = self._get(url, params=params)
+        if response.status_code != 200:
+            raise requests.HTTPError(
+                f'{url} returned status code {response.status_code}',
+                response=response
+                )
+        if not decode:
+            return response.content
+        if not self.hooks:
+            return self.json_loads(response.content)
+        start = time.perf_counter()
+        body = self.json_loads(response.content)
+        self._emit(
+            'page_parsed', endpoint=self._endpoints.get(url, url),
+            offset=(params or {}).get('skip', (params or {}).get('start')),
+            latency=time.perf_counter() - start,
+            bytes=len(response.content),
+            records=len(body.get('values') or []), total=body.get('total')
+            )
+        return body
+
+    def _iter_pages(
+            self,
+            url: str,
+            params: dict = None,
+            paging: str = 'skip',
+            skip: int = 0,
+            limit: int = None,
+            max_workers: int = None,
+            parse=None
+            ):
+        """Yield the records of every page of a paginated BLAZE endpoint,
+        one page at a time and in offset order.
+
+        The first page gives 'total' and 'limit', so every remaining offset
+        is known after it. With max_workers > 1 those offsets are fetched
+        concurrently on a thread pool. At most 2 * max_workers pages are
+        fetched ahead of the consumer so memory stays bounded.
+
+        With parse and parse_processes, each fetch thread hands the raw
+        page bytes to the parse pool as soon as they arrive and moves on
+        to the next page, so downloading and parsing overlap.
+
+        Args:
+            url (str): endpoint url.
+            params (dict, optional): query params other than paging.
+                Defaults to None.
+            paging (str, optional): 'skip' for endpoints paged with skip,
+                'start' for endpoints paged with start/limit.
+                Defaults to 'skip'.
+            skip (int, optional): nbr records to skip at first API call.
+                Defaults to 0.
+            limit (int, optional): page size to request. Defaults to None
+                (server default).
+            max_workers (int, optional): nbr of threads fetching pages
+                after the first one. Keep it <= pool_maxsize so every
+                worker gets a pooled connection. Defaults to None (serial).
+            parse (callable, optional): picklable records -> object applied
+                to every page, in the parse pool when parse_processes is
+                set. Defaults to None.
+
+        Raises:
+            requests.HTTPError: on any non-200 response.
+
+        Yields:
+            list: raw records from the 'values' of one page, or what parse
+            returned for it.
+        """
+        if paging not in ('skip', 'start'):
+            raise ValueError(f'Unknown paging style: {paging}')
+        pool = self._parse_pool()\
+            if parse is not None and self.parse_processes else None
+
+        def page_params(offset: int) -> dict:
+            _params = dict(params or {})
+            _params[paging] = offset
+            if limit is not None:
+                _params['limit'] = limit
+            return _params
+
+        def fetch(offset: int):
+            if pool is not None:
+                return pool.submit(_parse_page, self._fetch_page(
+                    url, page_params(offset), decode=False
+                    ), parse, self.json_loads)
+            values = self._fetch_page(url, page_params(offset))\
+                .get('values') or []
+            return values if parse is None else parse(values)
+
+        body = self._fetch_page(url, page_params(skip))
+        values = body.get('values') or []
+        if values:
+            yield values if parse is None else parse(values)
+        page_limit = body.get('limit') or len(values)
+        total = body.get('total') or 0
+        if not values or skip + page_limit >= total:
+            return
+
+        offsets = range(skip + page_limit, total, page_limit)
+        if pool is not None or max_workers is not None and max_workers > 1:
+            workers = max_workers or 1
+            offsets = iter(offsets)
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                pending = deque(
+                    executor.submit(fetch, o)
+                    for o in islice(offsets, 2 * workers)
+                    )
+                try:
+                    while pending:
+                        page = pending.popleft().result()
+                        for offset in islice(offsets, 1):
+                            pending.append(executor.submit(fetch, offset))
+                        yield page if pool is None else page.result()
+                finally:
+                    for future in pending:
+                        future.cancel()
+            return
+
+        for offset in offsets:
+            values = self._fetch_page(url, page_params(offset))\
+                .get('values') or []
+            if not values:
+                return
+            yield values if parse is None else parse(values)
+
+    def _finish(
+            self,
+            name: str,
+            build,
+            records: list,
+            rows=None,
+            count: int = None
+            ) -> pd.DataFrame:
+        """Build a returned frame from raw records, then apply the column
+        selection and compact dtypes configured for it. Emits frame_built.
+        In 'records' and 'ndjson' output, rows are built instead and only
+        the column selection applies.
+
+        Args:
+            name (str): frame name, a key of SCHEMAS.
+            build (callable): records -> pd.DataFrame.
+            records (list): raw records.
+            rows (callable, optional): records -> list of row dicts, the
+                pandas-free counterpart of build. Defaults to None (the raw
+                records are the rows).
+            count (int, optional): nbr of raw records reported with
+                frame_built when records holds something else, e.g. frames
+                parsed page by page. Defaults to None (len(records)).
+
+        Returns:
+            pd.DataFrame | list | bytes: the frame, projected and/or
+            compacted, or its rows.
+        """
+        if self.output != 'frame':
+            return self._finish_rows(name, rows, records)
+        start = time.perf_counter()
+        dat = build(records)
+        if self.hooks:
+            self._emit(
+                'frame_built', endpoint=name,
+                latency=time.perf_counter() - start,
+                records=len(records) if count is None else count,
+                rows=len(dat)
+                )
+        columns = self.columns.get(name)
+        if columns is not None:
+            dat = dat[[col for col in columns if col in dat.columns]]
+        if self.compact_dtypes:
+            dat = compact_frame(dat, SCHEMAS.get(name))
+        return dat
+
+    def _finish_rows(self, name: str, rows, records: list):
+        """Records-mode counterpart of _finish.
+
+        Args:
+            name (str): frame name, a key of columns.
+            rows (callable): records -> list of row dicts, or None to
+                keep the raw nested records.
+            records (list): raw records.
+
+        Returns:
+            list | bytes: row dicts, or NDJSON bytes.
+        """
+        start = time.perf_counter()
+        # records may be shared with coalesced calls, so never hand them out
+        dat = list(records) if rows is None else rows(records)
+        columns = self.columns.get(name)
+        if columns is not None:
+            getters = [(col, _path_getter(col)) for col in columns]
+            dat = [
+                {col: get(record) for col, get in getters}
+                for record in dat
+                ]
+        if self.output == 'ndjson':
+            dat = to_ndjson(dat)
+        if self.hooks:
+            self._emit(
+                'frame_built', endpoint=name,
+                latency=time.perf_counter() - start, records=len(records),
+                rows=len(dat) if self.output == 'records' else None
+                )
+        return dat
+
+    def _parsed(self, shard: str) -> bool:
+        """Whether a get_* call should parse pages on the parse pool."""
+        return bool(self.parse_processes) and shard is None and\
+            self.output == 'frame'
+
+    def _collect(
+            self,
+            iter_records,
+            shard: str = None,
+            hourly: bool = False,
+            **kwargs
+            ) -> list:
+        """Collect every record of a date-windowed iter_* method. With
+        shard, the window is split into day (or hour) shards fetched
+        concurrently on max_workers threads, and records repeated at shard
+        boundaries are de-duplicated by id.
+
+        Args:
+            iter_records (callable): iter_* method taking start_date,
+                end_date, skip, max_workers and raw.
+            shard (str, optional): 'day' or 'hour'. Defaults to None
+                (one window).
+            hourly (bool, optional): whether the endpoint accepts hour
+                windows. Defaults to False.
+            **kwargs: arguments for iter_records.
+
+        Returns:
+            list: raw records.
+        """
+        key = (iter_records.__name__, shard) + tuple(sorted(
+            (name, value) for name, value in kwargs.items()
+            if name != 'max_workers'
+            ))
+        return self._coalesced(key, partial(
+            self._collect_windows, iter_records, shard, hourly, **kwargs
+            ))
+
+    def _collect_parsed(self, iter_records, parse, parse_key, **kwargs):
+        """Frames parsed page by page on the parse pool, coalesced like
+        _collect: identical calls in flight (and within memo_ttl) share
+        one fetch and its list of frames.
+
+        Args:
+            iter_records (callable): iter_* method taking parse.
+            parse (callable): picklable records -> pd.DataFrame.
+            parse_key (tuple): what identifies parse in the key, e.g.
+                ('item_sales', fields).
+            **kwargs: arguments for iter_records.
+
+        Returns:
+            tuple: (nbr of raw records, list of frames, one per page).
+        """
+        key = (iter_records.__name__, None, ('parse',) + parse_key) +\
+            tuple(sorted(
+                (name, value) for name, value in kwargs.items()
+                if name != 'max_workers'
+                ))
+
+        def fetch() -> tuple:
+            pages = list(iter_records(
+                raw=True, parse=partial(_counted, parse), **kwargs
+                ))
+            frames = [frame for _, frame in pages]
+            return sum(count for count, _ in pages), frames
+        return self._coalesced(key, fetch)
+
+    def _collect_windows(
+            self,
+            iter_records,
+            shard: str = None,
+            hourly: bool = False,
+            **kwargs
+            ) -> list:
+        """Uncoalesced body of _collect."""
+        if shard is None:
+            return _flatten(iter_records(raw=True, **kwargs))
+        if shard == 'hour' and not hourly:
+            raise ValueError('This endpoint can only be sharded by day')
+
+        max_workers = kwargs.pop('max_workers', None)
+        kwargs['skip'] = 0
+        windows = _shard_windows(
+            kwargs.pop('start_date'), kwargs.pop('end_date'), shard
+            )
+        with ThreadPoolExecutor(max_workers=max_workers or 1) as executor:
+            shards = executor.map(
+                lambda window: _flatten(iter_records(
+                    start_date=window[0], end_date=window[1], raw=True,
+                    **kwargs
+                    )),
+                windows
+                )
+            records = []
+            seen = set()
+            for shard_records in shards:
+                for record in shard_records:
+                    record_id = record.get('id')
+                    if record_id is None or record_id not in seen:
+                        seen.add(record_id)
+                        records.append(record)
+        return records
+
+    def iter_products(
+            self,
+            skip: int = 0,
+            max_workers: int = None,
+            raw: bool = False
+            ):
+        """Yield products one page at a time.
+        Args:
+            skip (int, optional): Nbr records to skip at API call.
+                Defaults to 0.
+            max_workers (int, optional): nbr of threads fetching pages
+                concurrently. Defaults to None (serial).
+            raw (bool, optional): yield raw record lists instead of
+                DataFrames. Defaults to False.
+        Yields:
+            pd.DataFrame | list: one page of products
+        """
+        pages = self._iter_pages(
+            self._url('products'), paging='skip', skip=skip,
+            max_workers=max_workers
+            )
+        return pages if raw else (
+            pd.DataFrame().from_records(page) for page in pages
+            )
+
+    def get_products(
+            self,
+            skip: int = 0,
+            max_workers: int = None
+            ) -> pd.DataFrame:
+        """
+        Retrieve all products from BLAZE API.
+        Args:
+            skip (int, optional): Nbr records to skip at API call.
+                Defaults to 0.
+            max_workers (int, optional): nbr of threads fetching pages
+                concurrently. Defaults to None (serial).
+        Returns:
+            pd.DataFrame: df of all products
+        """
+        try:
+            records = self._cached(
+                'products',
+                lambda: _flatten(self.iter_products(
+                    skip=skip, max_workers=max_workers, raw=True
+                    )),
+                skip
+                )
+        except requests.HTTPError as e:
+            return(
+                'Error retrieving products: with'
+                f' status code {e.response.status_code}'
+                )
+        return self._finish('products', _from_records, records)
+
+    def iter_vendors(
+            self,
+            skip: int = 0,
+            max_workers: int = None,
+            raw: bool = False
+            ):
+        """Yield vendors one page at a time.
+        Args:
+            skip (int, optional): nbr records to skip. Defaults to 0.
+            max_workers (int, optional): nbr of threads fetching pages
+                concurrently. Defaults to None (serial).
+            raw (bool, optional): yield raw record lists instead of
+                DataFrames. Defaults to False.
+        Yields:
+            pd.DataFrame | list: one page of vendors
+        """
+        pages = self._iter_pages(
+            self._url('vendors'), paging='skip', skip=skip,
+            max_workers=max_workers
+            )
+        return pages if raw else (_vendors_frame(page) for page in pages)
+
+    def get_vendors(
+            self,
+            skip: int = 0,
+            max_workers: int = None
+            ) -> pd.DataFrame:
+        """
+        Get all vendors from BLAZE.
+        Args:
+            skip (int, optional): nbr records to skip. Defaults to 0.
+            max_workers (int, optional): nbr of threads fetching pages
+                concurrently. Defaults to None (serial).
+        Returns:
+            pd.DataFrame: vendors data
+        """
+        try:
+            records = self._cached(
+                'vendors',
+                lambda: _flatten(self.iter_vendors(
+                    skip=skip, max_workers=max_workers, raw=True
+                    )),
+                skip
+                )
+        except requests.HTTPError as e:
+            return(
+                'Error retrieving products: with status code'
+                f' {e.response.status_code}'
+                )
+        return self._finish('vendors', _vendors_frame, records, _vendors_rows)
+
+    def iter_categories(self, max_workers: int = None, raw: bool = False):
+        """Yield categories as one page; the endpoint is not paginated.
+        Args:
+            max_workers (int, optional): unused, for parity with the other
+                iter_* methods. Defaults to None.
+            raw (bool, optional): yield raw record lists instead of
+                DataFrames. Defaults to False.
+        Yields:
+            pd.DataFrame | list: the categories
+        """
+        def pages():
+            yield self._fetch_page(self._url('categories')).get('values')\
+                or []
+        return pages() if raw else (pd.json_normalize(p) for p in pages())
+
+    def get_categories(self) -> pd.DataFrame:
+        """Get all categories under current context.
+
+        Returns:
+            pd.DataFrame: categories data
+        """
+        try:
+            records = self._cached(
+                'categories',
+                lambda: _flatten(self.iter_categories(raw=True))
+                )
+        except requests.HTTPError as e:
+            return(
+                'Error retrieving categories: with status code'
+                f' {e.response.status_code}'
+                )
+        return self._finish('categories', _normalize, records)
+
+    def iter_brands(
+            self,
+            skip: int = 0,
+            max_workers: int = None,
+            raw: bool = False
+            ):
+        """Yield brands one page at a time.
+        Args:
+            skip (int, optional): nbr of records to skip (api param).
+                Defaults to 0.
+            max_workers (int, optional): nbr of threads fetching pages
+                concurrently. Defaults to None (serial).
+            raw (bool, optional): yield raw record lists instead of
+                DataFrames. Defaults to False.
+        Yields:
+            pd.DataFrame | list: one page of brands
+        """
+        pages = self._iter_pages(
+            self._url('brands'), paging='start', skip=skip, limit=200,
+            max_workers=max_workers
+            )
+        return pages if raw else (pd.json_normalize(page) for page in pages)
+
+    def get_brands(
+            self,
+            skip: int = 0,
+            max_workers: int = None
+            ) -> pd.DataFrame:
+        """
+        Get all brands from BLAZE API.
+        Args:
+            skip (int, optional): nbr of records to skip (api param).
+                Defaults to 0.
+            max_workers (int, optional): nbr of threads fetching pages
+                concurrently. Defaults to None (serial).
+        Returns:
+            pd.DataFrame: Brands data
+        """
+        try:
+            records = self._cached(
+                'brands',
+                lambda: _flatten(self.iter_brands(
+                    skip=skip, max_workers=max_workers, raw=True
+                    )),
+                skip
+                )
+        except requests.HTTPError as e:
+            return(
+                'Error retrieving products: with status code '
+                f'{e.response.status_code}'
+                )
+        return self._finish('brands', _normalize, records)
+
+    def iter_curr_inventory(
+            self,
+            skip: int = 0,
+            inventory: str = 'Safe',
+            max_workers: int = None,
+            raw: bool = False
+            ):
+        """Yield batch quantities one page at a time.
+        Args:
+            skip (int, optional): nbr records to skip at API call.
+                Defaults to 0.
+            inventory (str, optional): inventory to query. Defaults to 'safe'.
+            max_workers (int, optional): nbr of threads fetching pages
+                concurrently. Defaults to None (serial).
+            raw (bool, optional): yield raw record lists instead of
+                DataFrames. Defaults to False.
+        Yields:
+            pd.DataFrame | list: one page of batch quantities
+        """
+        pages = self._iter_pages(
+            self._url('batch_quantities'),
+            params={'inventoryId': self.inventories.get(inventory)},
+            paging='start', skip=skip, max_workers=max_workers
+            )
+        return pages if raw else (pd.json_normalize(page) for page in pages)
+
+    def get_curr_inventory(
+            self,
+            skip: int = 0,
+            inventory: str = 'Safe',
+            max_workers: int = None
+            ) -> pd.DataFrame:
+        """
+        Retrieve batch quantities from BLAZE.
+        Args:
+            skip (int, optional): nbr records to skip at API call.
+                Defaults to 0.
+            inventory (str, optional): inventory to query. Defaults to 'safe'.
+            max_workers (int, optional): nbr of threads fetching pages
+                concurrently. Defaults to None (serial).
+        Returns:
+            pd.DataFrame: batch quantity df
+        """
+        try:
+            records = self._coalesced(
+                ('curr_inventory', skip, inventory),
+                lambda: _flatten(self.iter_curr_inventory(
+                    skip=skip, inventory=inventory, max_workers=max_workers,
+                    raw=True
+                    ))
+                )
+        except requests.HTTPError as e:
+            return (
+                f'Error retrieving inventory: {inventory} with '
+                f'id {(self._inventories or {}).get(inventory)} with status '
+                f'code {e.response.status_code}'
+                )
+        return self._finish('curr_inventory', _normalize, records)
+
+    def _get_inventory_locations(self) -> pd.DataFrame:
+        """Gets inventory locations for the current shop context.
+         Primarily used for __init__
+        but can be called directly. Or use <object>.inventories for a
+        list of inventories
+        in the current context.
+
+        Returns:
+            pd.DataFrame: DF of inventories active in BLAZE retail
+            and their attributes
+        """
+        url = self._url('inventories')
+        response = self._get(url)
+        if response.status_code == 200:
+            return pd.json_normalize(
+                self.json_loads(response.content).get('values')
+                )
+        else:
+            return (
+                'Error retrieving inventory locations with'
+                f' status code {response.status_code}'
+                )
+
+    def iter_members(
+            self,
+            start_date: str = (
+                datetime.today() - timedelta(days=1)
+                ).strftime('%m/%d/%Y'),
+            end_date: str = datetime.today().strftime('%m/%d/%Y'),
+            skip: int = 0,
+            limit: int = 100,
+            max_workers: int = None,
+            raw: bool = False
+            ):
+        """Yield members who joined between the dates given, one page
+        at a time.
+
+        Args:
+            start_date (str, optional): start date of window.
+                Defaults to yesterday.
+            end_date (str, optional): ending date of window. Defaults to today.
+            skip (int, optional): records to skip. Defaults to 0.
+            limit (int, optional): query limit. Defaults to 100.
+            max_workers (int, optional): nbr of threads fetching pages
+                concurrently. Defaults to None (serial).
+            raw (bool, optional): yield raw record lists instead of
+                DataFrames. Defaults to False.
+
+        Yields:
+            pd.DataFrame | list: one page of members.
+        """
+        params = {
+            'startDate': _to_epoch_ms(start_date),
+            'endDate': _to_epoch_ms(end_date)
+            }
+        pages = self._iter_pages(
+            self._url('members'), params=params, paging='skip', skip=skip,
+            limit=limit, max_workers=max_workers
+            )
+        return pages if raw else (pd.json_normalize(page) for page in pages)
+
+    def get_members(
+            self,
+            start_date: str = (
+                datetime.today() - timedelta(days=1)
+                ).strftime('%m/%d/%Y'),
+            end_date: str = datetime.today().strftime('%m/%d/%Y'),
+            skip: int = 0,
+            limit: int = 100,
+            max_workers: int = None,
+            shard: str = None
+            ) -> pd.DataFrame:
+        """Get DF of members under current context according to dates given.
+        Dates given reflect member
+        join date. If member joined between given dates,
+        then member will be retrieved.
+
+        Args:
+            start_date (str, optional): start date of window.
+                Defaults to yesterday.
+            end_date (str, optional): ending date of window. Defaults to today.
+            skip (int, optional): records to skip. Defaults to 0.
+            limit (int, optional): query limit. Defaults to 100.
+            max_workers (int, optional): nbr of threads fetching pages
+                concurrently. Defaults to None (serial).
+            shard (str, optional): split the window into 'day' or 'hour'
+                shards fetched concurrently on max_workers threads.
+                Defaults to None.
+
+        Returns:
+            pd.DataFrame: DF of members and their attributes.
+        """
+        try:
+            records = self._collect(
+                self.iter_members, shard=shard, hourly=True,
+                start_date=start_date, end_date=end_date, skip=skip,
+                limit=limit, max_workers=max_workers
+                )
+        except requests.HTTPError:
+            return None
+        return self._finish('members', _normalize, records)
+
+    def iter_employees(
+            self,
+            skip: int = 0,
+            limit: int = 200,
+            max_workers: int = None,
+            raw: bool = False
+            ):
+        """Yield employee records one page at a time.
+
+        Args:
+            skip (int, optional): nbr of records to skip at API call.
+                Defaults to 0.
+            limit (int, optional): record limit. Defaults to 200.
+            max_workers (int, optional): nbr of threads fetching pages
+                concurrently. Defaults to None (serial).
+            raw (bool, optional): yield raw record lists instead of
+                DataFrames. Defaults to False.
+
+        Yields:
+            pd.DataFrame | list: one page of employees.
+        """
+        pages = self._iter_pages(
+            self._url('employees'), paging='start', skip=skip, limit=limit,
+            max_workers=max_workers
+            )
+        return pages if raw else (pd.json_normalize(page) for page in pages)
+
+    def get_employees(
+            self,
+            skip: int = 0,
+            limit: int = 200,
+            max_workers: int = None
+            ) -> pd.DataFrame:
+        """Get all employee records under the current context.
+
+        Args:
+            skip (int, optional): nbr of records to skip at API call.
+                Defaults to 0.
+            limit (int, optional): record limit. Defaults to 200.
+            max_workers (int, optional): nbr of threads fetching pages
+                concurrently. Defaults to None (serial).
+
+        Returns:
+            pd.DataFrame: dataframe of all employees and details.
+        """
+        try:
+            records = self._coalesced(
+                ('employees', skip, limit),
+                lambda: _flatten(self.iter_employees(
+                    skip=skip, limit=limit, max_workers=max_workers, raw=True
+                    ))
+                )
+        except requests.HTTPError:
+            return None
+        return self._finish('employees', _normalize, records)
+
+    def iter_item_sales(
+            self,
+            start_date: str = (
+                datetime.today() - timedelta(days=1)
+                ).strftime('%m/%d/%Y'),
+            end_date: str = datetime.today().strftime('%m/%d/%Y'),
+            skip: int = 0,
+            limit: int = 100,
+            max_workers: int = None,
+            raw: bool = False,
+            fields: list = None
+            ):
+        """Yield line item sales for specified dates, one page of
+        transactions at a time.
+
+        Args:
+            start_date (str, optional): date window start.
+                Defaults to yesterday.
+            end_date (str, optional): date window end. Defaults to today.
+            skip (int, optional): nbr records to skip in API call.
+                Defaults to 0.
+            max_workers (int, optional): nbr of threads fetching pages
+                concurrently. Defaults to None (serial).
+            raw (bool, optional): yield raw line item lists instead of
+                DataFrames. Defaults to False.
+            fields (list, optional): dotted item paths to keep, e.g.
+                ['productId', 'quantity', 'finalPrice']. Parent keys
+                (ITEM_SALES_PARENT_FIELDS) are added to each line.
+                Defaults to None (every item field plus the parent id).
+
+        Yields:
+            pd.DataFrame | list: line items of one page of transactions.
+        """
+        pages = self.iter_transactions(
+            start_date=start_date, end_date=end_date, skip=skip,
+            limit=limit, max_workers=max_workers, raw=True
+            )
+        return (
+            _item_sales_records(page, fields) if raw
+            else _item_sales_frame(page, fields)
+            for page in pages
+            )
+
+    def get_item_sales(
+            self,
+            start_date: str = (
+                datetime.today() - timedelta(days=1)
+                ).strftime('%m/%d/%Y'),
+            end_date: str = datetime.today().strftime('%m/%d/%Y'),
+            skip: int = 0,
+            limit: int = 100,
+            max_workers: int = None,
+            shard: str = None,
+            fields: list = None
+            ) -> pd.DataFrame:
+        """Get line item sales for specified dates.
+
+        Args:
+            start_date (str, optional): date window start.
+                Defaults to yesterday.
+            end_date (str, optional): date window end. Defaults to today.
+            skip (int, optional): nbr records to skip in API call.
+                Defaults to 0.
+            max_workers (int, optional): nbr of threads fetching pages
+                concurrently. Defaults to None (serial).
+            shard (str, optional): split the window into 'day' shards
+                fetched concurrently on max_workers threads.
+                Defaults to None.
+            fields (list, optional): dotted item paths to keep, e.g.
+                ['productId', 'quantity', 'finalPrice']. Parent keys
+                (ITEM_SALES_PARENT_FIELDS) are added to each line.
+                Defaults to None (every item field plus the parent id).
+
+        Returns:
+            pd.DataFrame: dataframe of line item sales and details.
+        """
+        try:
+            if self._parsed(shard):
+                count, frames = self._collect_parsed(
+                    self.iter_transactions,
+                    partial(_item_sales_frame, fields=fields),
+                    ('item_sales', None if fields is None else tuple(fields)),
+                    start_date=start_date, end_date=end_date, skip=skip,
+                    limit=limit, max_workers=max_workers
+                    )
+                return self._finish(
+                    'item_sales', _concat, frames, count=count
+                    )
+            records = self._collect(
+                self.iter_transactions, shard=shard,
+                start_date=start_date, end_date=end_date, skip=skip,
+                limit=limit, max_workers=max_workers
+                )
+        except requests.HTTPError:
+            return None
+        return self._finish(
+            'item_sales',
+            lambda records: _item_sales_frame(records, fields), records,
+            lambda records: _item_sales_records(records, fields)
+            )
+
+    def iter_transactions(
+            self,
+            start_date: str = (
+                datetime.today() - timedelta(days=1)
+                ).strftime('%m/%d/%Y'),
+            end_date: str = datetime.today().strftime('%m/%d/%Y'),
+            skip: int = 0,
+            limit: int = 100,
+            max_workers: int = None,
+            raw: bool = False,
+            parse=None
+            ):
+        """Yield transactions for given timeframe one page at a time.
+
+        Args:
+            start_date (str, optional): start date of time window.
+                Defaults to yesterday.
+            end_date (str, optional): end date of time window.
+                Defaults to today.
+            skip (int, optional): nbr records to skip in API call.
+                Defaults to 0.
+            max_workers (int, optional): nbr of threads fetching pages
+                concurrently. Defaults to None (serial).
+            raw (bool, optional): yield raw record lists instead of
+                DataFrames. Defaults to False.
+            parse (callable, optional): picklable records -> object run on
+                each raw page, on the parse pool when parse_processes is
+                set; with raw=True its results are yielded.
+                Defaults to None.
+
+        Yields:
+           pd.DataFrame | list: one page of transactions (header level).
+        """
+        params = {
+            'startDate': start_date,
+            'endDate': end_date
+            }
+        pages = self._iter_pages(
+            self._url('transactions'), params=params, paging='skip',
+            skip=skip, limit=limit, max_workers=max_workers, parse=parse
+            )
+        return pages if raw else (pd.json_normalize(page) for page in pages)
+
+    def get_transactions(
+            self,
+            start_date: str = (
+                datetime.today() - timedelta(days=1)
+                ).strftime('%m/%d/%Y'),
+            end_date: str = datetime.today().strftime('%m/%d/%Y'),
+            skip: int = 0,
+            limit: int = 100,
+            max_workers: int = None,
+            shard: str = None
+            ) -> pd.DataFrame:
+        """Get transactions for given timeframe.
+
+        Args:
+            start_date (str, optional): start date of time window.
+                Defaults to yesterday.
+            end_date (str, optional): end date of time window.
+                Defaults to today.
+            skip (int, optional): nbr records to skip in API call.
+                Defaults to 0.
+            max_workers (int, optional): nbr of threads fetching pages
+                concurrently. Defaults to None (serial).
+            shard (str, optional): split the window into 'day' shards
+                fetched concurrently on max_workers threads.
+                Defaults to None.
+
+        Returns:
+           pd.DataFrame: dataframe of transactions and details (header level).
+        """
+        try:
+            if self._parsed(shard):
+                count, frames = self._collect_parsed(
+                    self.iter_transactions, _normalize, ('transactions',),
+                    start_date=start_date, end_date=end_date, skip=skip,
+                    limit=limit, max_workers=max_workers
+                    )
+                return self._finish(
+                    'transactions', _concat, frames, count=count
+                    )
+            records = self._collect(
+                self.iter_transactions, shard=shard,
+                start_date=start_date, end_date=end_date, skip=skip,
+                limit=limit, max_workers=max_workers
+                )
+        except requests.HTTPError:
+            return None
+        return self._finish('transactions', _normalize, records)
+
+    def get_transactions_with_items(
+            self,
+            start_date: str = (
+                datetime.today() - timedelta(days=1)
+                ).strftime('%m/%d/%Y'),
+            end_date: str = datetime.today().strftime('%m/%d/%Y'),
+            skip: int = 0,
+            limit: int = 100,
+            max_workers: int = None,
+            shard: str = None
+            ) -> tuple:
+        """Get transaction headers and their line items from a single
+        pass over the transactions endpoint. Cheaper than calling
+        get_transactions and get_item_sales, which both download every page.
+
+        Args:
+            start_date (str, optional): start date of time window.
+                Defaults to yesterday.
+            end_date (str, optional): end date of time window.
+                Defaults to today.
+            skip (int, optional): nbr records to skip in API call.
+                Defaults to 0.
+            max_workers (int, optional): nbr of threads fetching pages
+                concurrently. Defaults to None (serial).
+            shard (str, optional): split the window into 'day' shards
+                fetched concurrently on max_workers threads.
+                Defaults to None.
+
+        Returns:
+            tuple: (transactions, item_sales) dataframes. Headers leave out
+            the nested cart.items list; item rows carry transactionId.
+        """
+        try:
+            records = self._collect(
+                self.iter_transactions, shard=shard,
+                start_date=start_date, end_date=end_date, skip=skip,
+                limit=limit, max_workers=max_workers
+                )
+        except requests.HTTPError:
+            return None
+        return (
+            self._finish(
+                'transactions',
+                lambda records: pd.json_normalize(records).drop(
+                    columns='cart.items', errors='ignore'
+                    ),
+                records,
+                lambda records: _without(records, 'cart.items')
+                ),
+            self._finish(
+                'item_sales', _item_sales_frame, records, _item_sales_records
+                )
+            )
+
+    def iter_purchase_orders(
+            self,
+            start_date: str = (
+                datetime.today() - timedelta(days=1)
+                ).strftime('%m/%d/%Y'),
+            end_date: str = datetime.today().strftime('%m/%d/%Y'),
+            limit: int = 200,
+            skip: int = 0,
+            max_workers: int = None,
+            raw: bool = False,
+            parse=None
+            ):
+        """Yield purchase orders (header level) one page at a time.
+
+        Args:
+            start_date (str, optional): start date of time window.
+                Defaults to yesterday.
+            end_date (str, optional): end date of time window.
+                Defaults to today.
+            limit (int, optional): nbr records to limit. Defaults to 200.
+            skip (int, optional): nbr records to skip at API call.
+                Defaults to 0.
+            max_workers (int, optional): nbr of threads fetching pages
+                concurrently. Defaults to None (serial).
+            raw (bool, optional): yield raw record lists instead of
+                DataFrames. Defaults to False.
+            parse (callable, optional): picklable records -> object run on
+                each raw page, on the parse pool when parse_processes is
+                set; with raw=True its results are yielded.
+                Defaults to None.
+
+        Yields:
+            pd.DataFrame | list: one page of purchase orders.
+        """
+        params = {
+            'startDate': start_date,
+            'endDate': end_date
+            }
+        pages = self._iter_pages(
+            self._url('purchase_orders'), params=params, paging='start',
+            skip=skip, limit=limit, max_workers=max_workers, parse=parse
+            )
+        return pages if raw else (pd.json_normalize(page) for page in pages)
+
+    def get_purchase_orders(
+            self,
+            start_date: str = (
+                datetime.today() - timedelta(days=1)
+                ).strftime('%m/%d/%Y'),
+            end_date: str = datetime.today().strftime('%m/%d/%Y'),
+            limit: int = 200,
+            skip: int = 0,
+            max_workers: int = None,
+            shard: str = None
+            ) -> pd.DataFrame:
+        """Get purchase orders under current context at top (header) level.
+
+        Args:
+            start_date (str, optional): start date of time window.
+                Defaults to yesterday.
+            end_date (str, optional): end date of time window.
+                Defaults to today.
+            limit (int, optional): nbr records to limit. Defaults to 200.
+            skip (int, optional): nbr records to skip at API call.
+                Defaults to 0.
+            max_workers (int, optional): nbr of threads fetching pages
+                concurrently. Defaults to None (serial).
+            shard (str, optional): split the window into 'day' shards
+                fetched concurrently on max_workers threads.
+                Defaults to None.
+
+        Returns:
+            pd.DataFrame: purchase orders records and details.
+        """
+        try:
+            if self._parsed(shard):
+                count, frames = self._collect_parsed(
+                    self.iter_purchase_orders, _normalize,
+                    ('purchase_orders',),
+                    start_date=start_date, end_date=end_date, limit=limit,
+                    skip=skip, max_workers=max_workers
+                    )
+                return self._finish(
+                    'purchase_orders', _concat, frames, count=count
+                    )
+            records = self._collect(
+                self.iter_purchase_orders, shard=shard,
+                start_date=start_date, end_date=end_date, limit=limit,
+                skip=skip, max_workers=max_workers
+                )
+        except requests.HTTPError:
+            return None
+        return self._finish('purchase_orders', _normalize, records)
+
+    def iter_po_line_items(
+            self,
+            start_date: str = (
+                datetime.today() - timedelta(days=1)
+                ).strftime('%m/%d/%Y'),
+            end_date: str = datetime.today().strftime('%m/%d/%Y'),
+            limit: int = 200,
+            skip: int = 0,
+            max_workers: int = None,
+            raw: bool = False,
+            fields: list = None
+            ):
+        """Yield purchase order line items, one page of purchase orders
+        at a time.
+
+        Args:
+            start_date (str, optional): start date of time window.
+                Defaults to yesterday.
+            end_date (str, optional): end date of time window.
+                Defaults to today.
+            limit (int, optional): nbr records to limit. Defaults to 200.
+            skip (int, optional): nbr records to skip at API call.
+                Defaults to 0.
+            max_workers (int, optional): nbr of threads fetching pages
+                concurrently. Defaults to None (serial).
+            raw (bool, optional): yield raw line item lists instead of
+                DataFrames. Defaults to False.
+            fields (list, optional): dotted item paths to keep, e.g.
+                ['productId', 'quantity', 'finalPrice']. Parent keys
+                (PO_LINE_PARENT_FIELDS) are added to each line.
+                Defaults to None (every item field plus the parent id).
+
+        Yields:
+            pd.DataFrame | list: line items of one page of purchase orders.
+        """
+        pages = self.iter_purchase_orders(
+            start_date=start_date, end_date=end_date, limit=limit,
+            skip=skip, max_workers=max_workers, raw=True
+            )
+        return (
+            _po_line_items_records(page, fields) if raw
+            else _po_line_items_frame(page, fields)
+            for page in pages
+            )
+
+    def get_po_line_items(
+            self,
+            start_date: str = (
+                datetime.today() - timedelta(days=1)
+                ).strftime('%m/%d/%Y'),
+            end_date: str = datetime.today().strftime('%m/%d/%Y'),
+            limit: int = 200,
+            skip: int = 0,
+            max_workers: int = None,
+            shard: str = None,
+            fields: list = None
+            ) -> pd.DataFrame:
+        """Get purchase order line items under current context.
+
+        Args:
+            start_date (str, optional): start date of time window.
+                Defaults to yesterday.
+            end_date (str, optional): end date of time window.
+                Defaults to today.
+            limit (int, optional): nbr records to limit. Defaults to 200.
+            skip (int, optional): nbr records to skip at API call.
+                Defaults to 0.
+            max_workers (int, optional): nbr of threads fetching pages
+                concurrently. Defaults to None (serial).
+            shard (str, optional): split the window into 'day' shards
+                fetched concurrently on max_workers threads.
+                Defaults to None.
+            fields (list, optional): dotted item paths to keep, e.g.
+                ['productId', 'quantity', 'finalPrice']. Parent keys
+                (PO_LINE_PARENT_FIELDS) are added to each line.
+                Defaults to None (every item field plus the parent id).
+
+        Returns:
+            pd.DataFrame: purchase order line items and details.
+        """
+        try:
+            if self._parsed(shard):
+                count, frames = self._collect_parsed(
+                    self.iter_purchase_orders,
+                    partial(_po_line_items_frame, fields=fields),
+                    ('po_line_items',
+                     None if fields is None else tuple(fields)),
+                    start_date=start_date, end_date=end_date, limit=limit,
+                    skip=skip, max_workers=max_workers
+                    )
+                return self._finish(
+                    'po_line_items', _concat, frames, count=count
+                    )
+            records = self._collect(
+                self.iter_purchase_orders, shard=shard,
+                start_date=start_date, end_date=end_date, limit=limit,
+                skip=skip, max_workers=max_workers
+                )
+        except requests.HTTPError:
+            return None
+        return self._finish(
+            'po_line_items',
+            lambda records: _po_line_items_frame(records, fields), records,
+            lambda records: _po_line_items_records(records, fields)
+            )
+
+    def get_purchase_orders_with_items(
+            self,
+            start_date: str = (
+                datetime.today() - timedelta(days=1)
+                ).strftime('%m/%d/%Y'),
+            end_date: str = datetime.today().strftime('%m/%d/%Y'),
+            limit: int = 200,
+            skip: int = 0,
+            max_workers: int = None,
+            shard: str = None
+            ) -> tuple:
+        """Get purchase order headers and their line items from a single
+        pass over the purchase orders endpoint.
+
+        Args:
+            start_date (str, optional): start date of time window.
+                Defaults to yesterday.
+            end_date (str, optional): end date of time window.
+                Defaults to today.
+            limit (int, optional): nbr records to limit. Defaults to 200.
+            skip (int, optional): nbr records to skip at API call.
+                Defaults to 0.
+            max_workers (int, optional): nbr of threads fetching pages
+                concurrently. Defaults to None (serial).
+            shard (str, optional): split the window into 'day' shards
+                fetched concurrently on max_workers threads.
+                Defaults to None.
+
+        Returns:
+            tuple: (purchase_orders, po_line_items) dataframes. Headers
+            leave out the nested line item list; line item rows carry
+            purchaseOrderId.
+        """
+        try:
+            records = self._collect(
+                self.iter_purchase_orders, shard=shard,
+                start_date=start_date, end_date=end_date, limit=limit,
+                skip=skip, max_workers=max_workers
+                )
+        except requests.HTTPError:
+            return None
+        return (
+            self._finish(
+                'purchase_orders',
+                lambda records: pd.json_normalize(records).drop(
+                    columns='poProductRequestResultList', errors='ignore'
+                    ),
+                records,
+                lambda records: _without(
+                    records, 'poProductRequestResultList'
+                    )
+                ),
+            self._finish(
+                'po_line_items', _po_line_items_frame, records,
+                _po_line_items_records
+                )
+            )
+
+    def _shop_key(self) -> str:
+        """Stable, non-secret key for the shop behind these credentials."""
+        return hashlib.sha256(
+            f'{self.partner_key}:{self.Authorization}'.encode()
+            ).hexdigest()[:16]
+
+    def sync(
+            self,
+            endpoint: str,
+            store: 'sync_store',
+            shop: str = None,
+            overlap: timedelta = timedelta(hours=1),
+            start_date: str = None,
+            max_workers: int = None
+            ) -> pd.DataFrame:
+        """Incrementally sync transactions, item_sales, members or
+        purchase_orders into a sync_store. Only records modified after the
+        stored high-water mark (minus overlap, to catch late edits) are
+        fetched; they are upserted by id and the mark is moved forward.
+
+        The API filters on dates, so the window requested starts at the
+        day of the mark and rows older than the mark are dropped here.
+        Members are filtered by join date on the API side, so edits to
+        older members are not picked up.
+
+        Args:
+            endpoint (str): 'transactions', 'item_sales', 'members' or
+                'purchase_orders'.
+            store (sync_store): where watermarks and records are kept.
+            shop (str, optional): shop key for the watermark. Defaults to a
+                hash of the client credentials.
+            overlap (timedelta, optional): how far before the mark to
+                re-fetch. Defaults to 1 hour.
+            start_date (str, optional): first run window start as
+                '%m/%d/%Y'. Defaults to yesterday.
+            max_workers (int, optional): nbr of threads fetching pages
+                concurrently. Defaults to None (serial).
+
+        Returns:
+            pd.DataFrame: records fetched (new or changed) in this run.
+        """
+        sources = {
+            'transactions': self.iter_transactions,
+            'item_sales': self.iter_transactions,
+            'members': self.iter_members,
+            'purchase_orders': self.iter_purchase_orders
+            }
+        if endpoint not in sources:
+            raise ValueError(f'Incremental sync not supported for {endpoint}')
+        shop = shop or self._shop_key()
+
+        mark = store.get_watermark(endpoint, shop)
+        if mark is not None:
+            since = datetime.fromtimestamp(mark / 1000) - overlap
+        elif start_date is not None:
+            since = datetime.strptime(start_date, '%m/%d/%Y')
+        else:
+            since = datetime.today() - timedelta(days=1)
+        since_ms = int(since.timestamp() * 1000)
+
+        records = [
+            record for record in _flatten(sources[endpoint](
+                start_date=since.strftime('%m/%d/%Y'),
+                # end of today, the API window ends at midnight of end_date
+                end_date=(
+                    datetime.today() + timedelta(days=1)
+                    ).strftime('%m/%d/%Y'),
+                max_workers=max_workers,
+                raw=True
+                ))
+            if mark is None or _modified_ms(record) >= since_ms
+            ]
+        new_mark = max(map(_modified_ms, records), default=mark)
+        if endpoint == 'item_sales':
+            records = _item_sales_records(records)
+
+        store.upsert(endpoint, shop, records, watermark=new_mark)
+        if endpoint == 'item_sales':
+            return self._finish(endpoint, _from_records, records)
+        return self._finish(endpoint, _normalize, records)
+
+    def export(self, endpoint: str, sink: 'dataset_sink', **kwargs) -> int:
+        """Stream a paginated endpoint into a dataset_sink page by page,
+        without building a DataFrame.
+
+        Args:
+            endpoint (str): name of an iter_* method, e.g. 'transactions',
+                'item_sales', 'po_line_items', 'curr_inventory', 'members'.
+            sink (dataset_sink): destination dataset.
+            **kwargs: arguments of the iter_* method.
+
+        Returns:
+            int: nbr records written.
+        """
+        return sink.write(
+            getattr(self, f'iter_{endpoint}')(raw=True, **kwargs)
+            )
+
+    def get_records(self, endpoint: str, **kwargs) -> list:
+        """Fetch every page of an endpoint as decoded records, without
+        building any pandas object.
+
+        Args:
+            endpoint (str): name of an iter_* method, e.g. 'transactions'.
+            **kwargs: arguments of the iter_* method.
+
+        Returns:
+            list: raw records (line items for item_sales / po_line_items).
+        """
+        return _flatten(
+            getattr(self, f'iter_{endpoint}')(raw=True, **kwargs)
+            )
+
+
+def snapshot_inventories(
+        credentials,
+        inventories: list = None,
+        max_workers: int = 16,
+        per_shop: int = 4,
+        **client_kwargs
+        ) -> pd.DataFrame:
+    """Snapshot current batch quantities for many shops and inventories at
+    once. Every (shop, inventory) pair is fetched concurrently on one
+    thread pool, while each shop's own scheduler caps its requests in
+    flight at per_shop.
+
+    Args:
+        credentials (list | dict): (partner_key, Authorization) tuples, or
+            shop label -> (partner_key, Authorization). The shop column
+            holds the labels, or list positions; records also carry
+            BLAZE's own shopId.
+        inventories (list, optional): inventory names to snapshot in every
+            shop; names a shop does not have are skipped.
+            Defaults to None (every inventory of each shop).
+        max_workers (int, optional): threads shared by all shops.
+            Defaults to 16.
+        per_shop (int, optional): max requests in flight per shop.
+            Defaults to 4.
+        **client_kwargs: extra blaze_retail_api arguments, other than the
+            credentials, pool_maxsize and scheduler set per shop.
+
+    Raises:
+        TypeError: if client_kwargs holds an argument set per shop.
+
+    Returns:
+        pd.DataFrame: batch quantities of every pair, tagged with shop and
+        inventory columns.
+    """
+    reserved = sorted({
+        'partner_key', 'Authorization', 'pool_maxsize', 'scheduler'
+        }.intersection(client_kwargs))
+    if reserved:
+        raise TypeError(
+            f'snapshot_inventories sets {reserved} for every shop itself; '
+            'use credentials and per_shop instead'
+            )
+    if not isinstance(credentials, dict):
+        credentials = dict(enumerate(credentials))
+    clients = {
+        shop: blaze_retail_api(
+            partner_key, Authorization,
+            pool_maxsize=per_shop,
+            scheduler=request_scheduler(max_concurrency=per_shop),
+            **client_kwargs
+            )
+        for shop, (partner_key, Authorization) in credentials.items()
+        }
+
+    def snapshot(pair: tuple) -> list:
+        shop, inventory = pair
+        return [
+            {'shop': shop, 'inventory': inventory, **record}
+            for record in _flatten(clients[shop].iter_curr_inventory(
+                inventory=inventory, raw=True
+                ))
+            ]
+
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            shop_inventories = dict(zip(clients, executor.map(
+                lambda client: client.inventories, clients.values()
+                )))
+            pairs = [
+                (shop, name)
+                for shop, names in shop_inventories.items()
+                for name in names
+                if inventories is None or name in inventories
+                ]
+            records = _flatten(executor.map(snapshot, pairs))
+    finally:
+        for client in clients.values():
+            client.close()
+    return pd.json_normalize(records)
+
+
+class catalog_index():
+    """In-memory index of the catalog (products, vendors, brands and
+    categories), fetched once and refreshed incrementally, for attaching
+    catalog attributes to item sales or inventory frames without merges.
+
+    Each table keeps its ids in a pd.Index (hashed once) mapping id to row
+    position. Rows never move: a refresh updates changed rows in place and
+    appends new ids. Product -> brand / vendor / category links are
+    resolved at refresh, so enrich() costs one hash lookup per row plus
+    integer takes per attribute. Text attributes come back categorical.
+    """
+
+    TABLES = ('products', 'vendors', 'brands', 'categories')
+    LINKS = {
+        'brands': 'brandId',
+        'vendors': 'vendorId',
+        'categories': 'categoryId'
+        }
+
+    def __init__(
+            self,
+            client: blaze_retail_api,
+            fields: dict = None,
+            max_workers: int = None
+            ) -> None:
+        """
+        Args:
+            client (blaze_retail_api): client to fetch the catalog with.
+            fields (dict, optional): table -> {source field: column name}
+                to attach. Defaults to CATALOG_FIELDS.
+            max_workers (int, optional): nbr of threads fetching pages.
+                Defaults to None (serial).
+        """
+        self.client = client
+        self.fields = CATALOG_FIELDS if fields is None else fields
+        self.max_workers = max_workers
+        self.refreshed = None
+        self._ids = {}
+        self._values = {}
+        self._modified = {}
+        self._lookup = {}
+        self._lock = threading.Lock()
+        self.refresh()
+
+    def _keys(self, table: str) -> list:
+        keys = list(self.fields.get(table, {}))
+        if table == 'products':
+            keys += [key for key in self.LINKS.values() if key not in keys]
+        return keys
+
+    def _merge(self, table: str, records: list) -> int:
+        """Merge fetched records into a table.
+
+        Args:
+            table (str): catalog table.
+            records (list): raw records.
+
+        Returns:
+            int: nbr rows added or changed.
+        """
+        unique = {}
+        for record in records:
+            unique.setdefault(record.get('id'), record)
+        records = list(unique.values())
+        ids = pd.Index(list(unique), dtype=object)
+        modified = np.array([_modified_ms(r) for r in records], dtype=float)
+        values = {}
+        for key in self._keys(table):
+            values[key] = np.empty(len(records), dtype=object)
+            values[key][:] = _extract(records, key)
+
+        if table not in self._ids:
+            self._ids[table] = ids
+            self._values[table] = values
+            self._modified[table] = modified
+            return len(ids)
+
+        positions = self._ids[table].get_indexer(ids)
+        known = positions >= 0
+        changed = known.copy()
+        changed[known] = self._modified[table][positions[known]] !=\
+            modified[known]
+        new = ~known
+        old_values = self._values[table]
+        for key, column in values.items():
+            column_values = old_values[key].copy()
+            column_values[positions[changed]] = column[changed]
+            old_values[key] = np.concatenate([column_values, column[new]])
+        old_modified = self._modified[table].copy()
+        old_modified[positions[changed]] = modified[changed]
+        self._modified[table] = np.concatenate([old_modified, modified[new]])
+        self._ids[table] = self._ids[table].append(ids[new])
+        return int(changed.sum() + new.sum())
+
+    @staticmethod
+    def _attribute(values: np.ndarray):
+        """Product-aligned attribute, with a trailing slot for unknown
+        products: ('codes', codes, categories) for text, ('values', array)
+        for numbers."""
+        series = pd.Series(values, dtype=object).infer_objects()
+        if series.dtype.kind in 'iuf':
+            return ('values', np.append(series.to_numpy(float), np.nan))
+        codes, categories = pd.factorize(series)
+        return ('codes', np.append(codes, -1), categories)
+
+    def _link(self) -> None:
+        """Rebuild the product-aligned attribute lookup."""
+        products = self._values['products']
+        lookup = {}
+        for key, name in self.fields.get('products', {}).items():
+            lookup[name] = self._attribute(products[key])
+        for table, key in self.LINKS.items():
+            if table not in self._ids:
+                continue
+            positions = self._ids[table].get_indexer(products[key])
+            positions[positions < 0] = len(self._ids[table])
+            for field, name in self.fields.get(table, {}).items():
+                values = np.append(self._values[table][field], None)
+                lookup[name] = self._attribute(values[positions])
+        self._lookup = lookup
+
+    def refresh(self, tables: list = None) -> dict:
+        """Fetch catalog tables and merge them into the index: rows whose
+        modified time changed are updated in place and new ids appended.
+
+        Args:
+            tables (list, optional): tables to refresh. Defaults to None
+                (all of TABLES).
+
+        Raises:
+            requests.HTTPError: on any non-200 response.
+
+        Returns:
+            dict: table -> nbr rows added or changed.
+        """
+        changed = {}
+        with self._lock:
+            for table in tables or self.TABLES:
+                changed[table] = self._merge(table, self.client.get_records(
+                    table, max_workers=self.max_workers
+                    ))
+            if any(changed.values()):
+                self._link()
+            self.refreshed = datetime.now()
+        return changed
+
+    def positions(self, table: str, ids) -> np.ndarray:
+        """Row positions of ids in a table, -1 for unknown ids.
+
+        Args:
+            table (str): catalog table.
+            ids (list-like): ids to look up.
+
+        Returns:
+            np.ndarray: row positions.
+        """
+        return self._ids[table].get_indexer(ids)
+
+    def frame(self, table: str) -> pd.DataFrame:
+        """Indexed fields of a table, one row per position.
+
+        Args:
+            table (str): catalog table.
+
+        Returns:
+            pd.DataFrame: frame indexed by id.
+        """
+        return pd.DataFrame(self._values[table], index=self._ids[table])
+
+    def enrich(
+            self,
+            dat: pd.DataFrame,
+            on: str = 'productId',
+            columns: list = None
+            ) -> pd.DataFrame:
+        """Attach product, brand, vendor and category attributes to a
+        frame of line items or batch quantities.
+
+        Args:
+            dat (pd.DataFrame): frame with a product id column.
+            on (str, optional): product id column. Defaults to 'productId'.
+            columns (list, optional): attribute columns to attach.
+                Defaults to None (all configured in fields).
+
+        Raises:
+            ValueError: if an attribute column is already in dat.
+
+        Returns:
+            pd.DataFrame: dat with the attribute columns added; products
+            not in the catalog get missing values.
+        """
+        lookup = self._lookup
+        names = list(lookup) if columns is None else columns
+        clashes = [name for name in names if name in dat.columns]
+        if clashes:
+            raise ValueError(
+                f'enrich would overwrite columns {clashes}; rename them in '
+                'fields or leave them out of columns'
+                )
+        keys = dat[on]
+        if isinstance(keys.dtype, pd.CategoricalDtype):
+            # look up each category once, then map the codes
+            positions = np.append(
+                self.positions('products', keys.cat.categories), -1
+                )[keys.cat.codes.to_numpy()]
+        else:
+            positions = self.positions('products', keys)
+        positions[positions < 0] = len(self._ids['products'])
+
+        attached = {}
+        for name in names:
+            attribute = lookup[name]
+            if attribute[0] == 'values':
+                attached[name] = attribute[1][positions]
+            else:
+                attached[name] = pd.Categorical.from_codes(
+                    attribute[1][positions], attribute[2]
+                    )
+        return dat.assign(**attached)
+
+
+def _canonical(values: pd.Series) -> pd.Series:
+    """Values as text that depends on nothing but the value itself, so
+    equal values hash equal whatever else is on the page: numbers and
+    booleans as floats (a missing field elsewhere turns ints into floats
+    and bools into objects), anything else as str. Missing values stay
+    missing."""
+    if values.dtype.kind in 'biuf':
+        text = values.astype('float64').astype(str)
+    elif isinstance(values.dtype, pd.StringDtype):
+        return values
+    else:
+        text = values.map(
+            lambda value: repr(float(value))
+            if isinstance(value, (bool, int, float, np.number, np.bool_))
+            else str(value),
+            na_action='ignore'
+            )
+    return text.where(values.notna())
+
+
+class inventory_snapshots():
+    """Keeps the last batch quantity snapshot of each inventory and turns
+    every poll into a change feed instead of a full frame.
+
+    Rows are keyed by (productId, batchId) and carry a hash of their other
+    non-missing fields, independent of the fields other rows have. A poll
+    looks the new keys up in the previous snapshot's index and compares
+    hashes, all vectorised, to find added batches, removed batches and
+    changed rows. With path, snapshots are pickled after every
+    poll so a restarted poller resumes from its last state.
+    """
+
+    KEYS = ('productId', 'batchId')
+    QUANTITY = 'quantity'
+    UNHASHED = ('modified',)
+    CHANGES = ('added', 'removed', 'changed')
+
+    def __init__(
+            self,
+            client: blaze_retail_api,
+            inventories: list = None,
+            fields: list = None,
+            path: str = None,
+            max_workers: int = None
+            ) -> None:
+        """
+        Args:
+            client (blaze_retail_api): client to poll with.
+            inventories (list, optional): inventory names to poll.
+                Defaults to None (every inventory in client.inventories).
+            fields (list, optional): fields whose change marks a row as
+                changed. Defaults to None (every field but the keys and
+                modified).
+            path (str, optional): pickle file keeping the snapshots across
+                restarts. Defaults to None (in memory only).
+            max_workers (int, optional): nbr of inventories fetched at
+                once. Defaults to None (one at a time).
+        """
+        self.client = client
+        self.inventories = inventories
+        self.fields = fields
+        self.path = path
+        self.max_workers = max_workers
+        self._snapshots = {}
+        self._lock = threading.Lock()
+        if path is not None and os.path.exists(path):
+            with open(path, 'rb') as f:
+                self._snapshots = pickle.load(f)
+
+    def _frame(self, records: list) -> pd.DataFrame:
+        """Snapshot frame of raw batch quantities, one row per key."""
+        dat = pd.json_normalize(records)
+        for key in self.KEYS:
+            if key not in dat.columns:
+                dat[key] = pd.Series(dtype=object)
+        return dat.drop_duplicates(list(self.KEYS), keep='last')\
+            .reset_index(drop=True)
+
+    def _hashes(self, dat: pd.DataFrame) -> np.ndarray:
+        """uint64 hash of each row's non-missing fields: the sum of one
+        hash per (field, value) pair. A field missing from a row adds
+        nothing, so rows hash the same whichever optional fields other
+        rows (or other polls) have."""
+        columns = [
+            col for col in dat.columns
+            if col not in self.KEYS and col not in self.UNHASHED
+            and (self.fields is None or col in self.fields)
+            ]
+        hashes = np.zeros(len(dat), dtype=np.uint64)
+        for col in columns:
+            text = _canonical(dat[col])
+            present = text.notna().to_numpy()
+            pairs = pd.util.hash_pandas_object(
+                f'{col}\x1f' + text[present], index=False
+                ).to_numpy()
+            hashes[present] += pairs
+        return hashes
+
+    def diff(self, inventory: str, records: list) -> pd.DataFrame:
+        """Compare new batch quantities of an inventory with its last
+        snapshot, then make them the new snapshot. On the first call for
+        an inventory every row is added.
+
+        Args:
+            inventory (str): inventory name.
+            records (list): raw batch quantity records.
+
+        Returns:
+            pd.DataFrame: one row per change with change ('added',
+            'removed' or 'changed'), inventory, the row's fields and
+            previous_quantity. Removed rows keep their last fields with
+            quantity 0.
+        """
+        new = self._frame(records)
+        index = pd.MultiIndex.from_frame(new[list(self.KEYS)])
+        hashes = self._hashes(new)
+        with self._lock:
+            previous = self._snapshots.get(inventory)
+            if previous is None:
+                old = new.iloc[:0]
+                positions = np.full(len(new), -1)
+            else:
+                old, old_index, old_hashes = previous
+                positions = old_index.get_indexer(index)
+            known = positions >= 0
+            changed = known.copy()
+            if previous is not None:
+                changed[known] = old_hashes[positions[known]] !=\
+                    hashes[known]
+            removed = np.ones(len(old), dtype=bool)
+            removed[positions[known]] = False
+            self._snapshots[inventory] = (new, index, hashes)
+
+        old_quantity = old[self.QUANTITY].to_numpy()\
+            if self.QUANTITY in old.columns else np.full(len(old), np.nan)
+        delta = pd.concat([
+            new[~known].assign(change='added', previous_quantity=np.nan),
+            new[changed].assign(
+                change='changed',
+                previous_quantity=old_quantity[positions[changed]]
+                ),
+            old[removed].assign(
+                change='removed', previous_quantity=old_quantity[removed],
+                **{self.QUANTITY: 0.0}
+                )
+            ], ignore_index=True)
+        delta.insert(0, 'inventory', inventory)
+        delta.insert(0, 'change', delta.pop('change'))
+        return delta
+
+    def poll(self, inventories: list = None) -> pd.DataFrame:
+        """Fetch the current batch quantities of each inventory and return
+        what changed since the last poll.
+
+        Args:
+            inventories (list, optional): inventory names to poll.
+                Defaults to None (the ones given at construction, else
+                every inventory in client.inventories).
+
+        Raises:
+            requests.HTTPError: on any non-200 response.
+
+        Returns:
+            pd.DataFrame: change feed of every polled inventory, see diff.
+        """
+        names = inventories or self.inventories or\
+            list(self.client.inventories)
+        with ThreadPoolExecutor(
+                max_workers=self.max_workers or 1
+                ) as executor:
+            fetched = list(executor.map(
+                lambda name: self.client.get_records(
+                    'curr_inventory', inventory=name
+                    ),
+                names
+                ))
+        delta = pd.concat(
+            [self.diff(name, records)
+             for name, records in zip(names, fetched)],
+            ignore_index=True
+            )
+        if self.path is not None:
+            self.save()
+        return delta
+
+    def snapshot(self, inventory: str) -> pd.DataFrame:
+        """Last snapshot of an inventory.
+
+        Args:
+            inventory (str): inventory name.
+
+        Returns:
+            pd.DataFrame: batch quantities as of the last poll, or None.
+        """
+        previous = self._snapshots.get(inventory)
+        return None if previous is None else previous[0]
+
+    def save(self) -> None:
+        """Write every snapshot to path, atomically."""
+        tmp = f'{self.path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with self._lock:
+            with open(tmp, 'wb') as f:
+                pickle.dump(self._snapshots, f)
+            os.replace(tmp, self.path)
+
+
+class sync_store():
+    """SQLite store of per-endpoint, per-shop high-water marks and the
+    records synced so far, upserted by id. See blaze_retail_api.sync.
+    """
+
+    def __init__(self, path: str = 'blaze_sync.db') -> None:
+        """
+        Args:
+            path (str, optional): SQLite database file.
+                Defaults to 'blaze_sync.db'.
+        """
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        with self.conn:
+            self.conn.execute(
+                'CREATE TABLE IF NOT EXISTS watermarks ('
+                'endpoint TEXT, shop TEXT, watermark INTEGER, '
+                'PRIMARY KEY (endpoint, shop))'
+                )
+            self.conn.execute(
+                'CREATE TABLE IF NOT EXISTS records ('
+                'endpoint TEXT, shop TEXT, id TEXT, modified INTEGER, '
+                'data TEXT, PRIMARY KEY (endpoint, shop, id))'
+                )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Close the database connection."""
+        self.conn.close()
+
+    def get_watermark(self, endpoint: str, shop: str) -> int:
+        """High-water mark of an endpoint for a shop.
+
+        Args:
+            endpoint (str): synced endpoint name.
+            shop (str): shop key.
+
+        Returns:
+            int: epoch milliseconds, or None before the first sync.
+        """
+        row = self.conn.execute(
+            'SELECT watermark FROM watermarks WHERE endpoint = ? AND shop = ?',
+            (endpoint, shop)
+            ).fetchone()
+        return None if row is None else row[0]
+
+    def upsert(
+            self,
+            endpoint: str,
+            shop: str,
+            records: list,
+            watermark: int = None
+            ) -> None:
+        """Insert or replace records by id and move the watermark, in a
+        single transaction.
+
+        Args:
+            endpoint (str): synced endpoint name.
+            shop (str): shop key.
+            records (list): raw records, each with an 'id'.
+            watermark (int, optional): new high-water mark in epoch ms.
+                Defaults to None (unchanged).
+        """
+        with self.conn:
+            self.conn.executemany(
+                'INSERT OR REPLACE INTO records VALUES (?, ?, ?, ?, ?)',
+                (
+                    (
+                        endpoint, shop, record.get('id'),
+                        _modified_ms(record), json.dumps(record)
+                        )
+                    for record in records
+                    )
+                )
+            if watermark is not None:
+                self.conn.execute(
+                    'INSERT OR REPLACE INTO watermarks VALUES (?, ?, ?)',
+                    (endpoint, shop, watermark)
+                    )
+
+    def records(self, endpoint: str, shop: str) -> list:
+        """All records synced so far for an endpoint and shop.
+
+        Args:
+            endpoint (str): synced endpoint name.
+            shop (str): shop key.
+
+        Returns:
+            list: raw records.
+        """
+        return [
+            json.loads(data) for data, in self.conn.execute(
+                'SELECT data FROM records WHERE endpoint = ? AND shop = ?',
+                (endpoint, shop)
+                )
+            ]
+
+
+def _fill_null_types(type_: 'pa.DataType') -> 'pa.DataType':
+    """Replace null types (fields only ever seen empty) with string, at any
+    depth, so later values can be cast to the type."""
+    if pa.types.is_null(type_):
+        return pa.string()
+    if pa.types.is_struct(type_):
+        return pa.struct([
+            type_.field(i).with_type(_fill_null_types(type_.field(i).type))
+            for i in range(type_.num_fields)
+            ])
+    if pa.types.is_list(type_) or pa.types.is_large_list(type_):
+        return pa.list_(_fill_null_types(type_.value_type))
+    return type_
+
+
+def _widen_type(old: 'pa.DataType', new: 'pa.DataType') -> 'pa.DataType':
+    """old, widened with the struct fields only new has, at any depth.
+    Where both have a value type, old's is kept and new values are cast
+    to it."""
+    if pa.types.is_null(new):
+        return old
+    if pa.types.is_null(old):
+        return _fill_null_types(new)
+    if pa.types.is_struct(old) and pa.types.is_struct(new):
+        fields = [old.field(i) for i in range(old.num_fields)]
+        names = [field.name for field in fields]
+        for i in range(new.num_fields):
+            field = new.field(i)
+            if field.name in names:
+                at = names.index(field.name)
+                fields[at] = fields[at].with_type(
+                    _widen_type(fields[at].type, field.type)
+                    )
+            else:
+                fields.append(field.with_type(_fill_null_types(field.type)))
+        return pa.struct(fields)
+    if (pa.types.is_list(old) or pa.types.is_large_list(old)) and\
+            (pa.types.is_list(new) or pa.types.is_large_list(new)):
+        return pa.list_(_widen_type(old.value_type, new.value_type))
+    return old
+
+
+def _field_paths(type_: 'pa.DataType', prefix: str = '') -> set:
+    """Dotted paths of every field nested in a struct (or list of
+    structs) type."""
+    while pa.types.is_list(type_) or pa.types.is_large_list(type_):
+        type_ = type_.value_type
+    if not pa.types.is_struct(type_):
+        return set()
+    paths = set()
+    for i in range(type_.num_fields):
+        field = type_.field(i)
+        paths.add(prefix + field.name)
+        paths |= _field_paths(field.type, f'{prefix}{field.name}.')
+    return paths
+
+
+class dataset_sink():
+    """Streams pages of raw records into a partitioned Parquet or Arrow IPC
+    dataset, hive-style: <root>/shop=<shop>/date=<YYYY-MM-DD>/part-*.
+    Every file is written with the sink's schema, either given or inferred
+    from the first rows written. Fields first seen later, top-level or
+    nested, widen the schema (with a warning) and every open file rolls
+    over, so no field is dropped; read files written before with
+    schema=sink.schema (parquet sinks also leave it in
+    <root>/_common_metadata). Records are buffered per partition into row
+    groups of row_group_size rows, and each partition keeps one file open,
+    rolled over once max_file_bytes have been written to it. Requires
+    pyarrow.
+    """
+
+    def __init__(
+            self,
+            root: str,
+            format: str = 'parquet',
+            shop: str = None,
+            date_field: str = 'created',
+            compression: str = 'snappy',
+            schema: 'pa.Schema' = None,
+            row_group_size: int = 65536,
+            max_file_bytes: int = 256 * 2 ** 20
+            ) -> None:
+        """
+        Args:
+            root (str): dataset directory.
+            format (str, optional): 'parquet' or 'arrow' (IPC file).
+                Defaults to 'parquet'.
+            shop (str, optional): shop partition for records without a
+                shopId. Defaults to None ('unknown').
+            date_field (str, optional): epoch ms field giving the date
+                partition. None (or a record missing the field) partitions
+                by the day written, e.g. for inventory snapshots.
+                Defaults to 'created'.
+            compression (str, optional): parquet compression codec.
+                Defaults to 'snappy'.
+            schema (pa.Schema, optional): starting schema. Defaults to
+                None (inferred from the first rows written; fields that
+                are empty in all of them are typed as strings).
+            row_group_size (int, optional): rows buffered per partition
+                before they are written. Defaults to 65536.
+            max_file_bytes (int, optional): uncompressed bytes written to
+                a file before the partition rolls over to a new one.
+                Defaults to 256 MiB.
+        """
+        if pa is None:
+            raise ImportError(
+                'dataset_sink requires pyarrow: pip install pyarrow'
+                )
+        if format not in ('parquet', 'arrow'):
+            raise ValueError(f'Unknown dataset format: {format}')
+        self.root = root
+        self.format = format
+        self.shop = shop
+        self.date_field = date_field
+        self.compression = compression
+        self.schema = schema
+        self.row_group_size = row_group_size
+        self.max_file_bytes = max_file_bytes
+        self.records_written = 0
+        self._prefix = uuid.uuid4().hex[:8]
+        self._parts = 0
+        self._buffers = {}
+        self._buffered = 0
+        self._files = {}
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    def _partition(self, record: dict, today: str) -> tuple:
+        ms = record.get(self.date_field) if self.date_field else None
+        date = datetime.fromtimestamp(ms / 1000).strftime('%Y-%m-%d')\
+            if ms else today
+        return (record.get('shopId') or self.shop or 'unknown', date)
+
+    def _table(self, rows: list) -> 'pa.Table':
+        """Rows as a table of the sink's schema, setting it on first use
+        and widening it (closing the open files) when rows bring new
+        fields."""
+        inferred = pa.struct(list(pa.Table.from_pylist(rows).schema))
+        if self.schema is None:
+            filled = _fill_null_types(inferred)
+            self.schema = pa.schema(
+                [filled.field(i) for i in range(filled.num_fields)]
+                )
+        current = pa.struct(list(self.schema))
+        widened = _widen_type(current, inferred)
+        if not widened.equals(current):
+            added = _field_paths(widened) - _field_paths(current)
+            warnings.warn(
+                f'dataset_sink {self.root}: new fields {sorted(added)}; '
+                'files written before lack them, read them with '
+                'schema=sink.schema'
+                )
+            for writer, _ in self._files.values():
+                writer.close()
+            self._files.clear()
+            self.schema = pa.schema(
+                [widened.field(i) for i in range(widened.num_fields)]
+                )
+        try:
+            return pa.Table.from_pylist(rows, schema=self.schema)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            # a field typed differently than in the schema, e.g. int ids
+            table = pa.Table.from_pylist(rows)
+        columns = []
+        for field in self.schema:
+            if field.name not in table.column_names:
+                columns.append(pa.nulls(len(table), field.type))
+                continue
+            try:
+                columns.append(table[field.name].cast(field.type))
+            except (pa.ArrowInvalid, pa.ArrowNotImplementedError) as e:
+                raise ValueError(
+                    f'dataset_sink {self.root}: field {field.name} of type '
+                    f'{field.type} cannot hold '
+                    f'{table.schema.field(field.name).type}; pass schema='
+                    ) from e
+        return pa.table(columns, schema=self.schema)
+
+    def _open(self, partition: tuple):
+        shop, date = partition
+        directory = os.path.join(self.root, f'shop={shop}', f'date={date}')
+        os.makedirs(directory, exist_ok=True)
+        self._parts += 1
+        path = os.path.join(
+            directory, f'part-{self._prefix}-{self._parts:05d}.{self.format}'
+            )
+        if self.format == 'parquet':
+            return pq.ParquetWriter(
+                path, self.schema, compression=self.compression
+                )
+        return pa.ipc.new_file(path, self.schema)
+
+    def _flush(self, partition: tuple) -> None:
+        if self.schema is None:
+            # infer the schema from every buffered row, not one partition
+            self._table([
+                row for rows in self._buffers.values() for row in rows
+                ])
+        rows = self._buffers.pop(partition)
+        self._buffered -= len(rows)
+        table = self._table(rows)
+        writer, size = self._files.get(partition) or (self._open(partition), 0)
+        writer.write_table(table)
+        size += table.nbytes
+        if size >= self.max_file_bytes:
+            writer.close()
+            self._files.pop(partition, None)
+        else:
+            self._files[partition] = (writer, size)
+
+    def write_page(self, records: list) -> int:
+        """Buffer one page of raw records, writing the row groups of the
+        partitions it fills. Buffered rows are capped at four row groups
+        across partitions; past that every partition is written.
+
+        Args:
+            records (list): raw records.
+
+        Returns:
+            int: nbr records written.
+        """
+        today = datetime.today().strftime('%Y-%m-%d')
+        with self._lock:
+            for record in records:
+                self._buffers.setdefault(
+                    self._partition(record, today), []
+                    ).append(record)
+            self._buffered += len(records)
+            for partition, rows in list(self._buffers.items()):
+                if len(rows) >= self.row_group_size \
+                        or self._buffered >= 4 * self.row_group_size:
+                    self._flush(partition)
+            self.records_written += len(records)
+        return len(records)
+
+    def write(self, pages) -> int:
+        """Write every page of an iter_* generator (raw=True), then close
+        the files.
+
+        Args:
+            pages (iterable): pages of raw records.
+
+        Returns:
+            int: nbr records written.
+        """
+        written = sum(self.write_page(page) for page in pages)
+        self.close()
+        return written
+
+    def close(self) -> None:
+        """Write the buffered rows and close the open files. The sink can
+        keep writing afterwards, into new files.
+        """
+        with self._lock:
+            for partition in list(self._buffers):
+                self._flush(partition)
+            for writer, _ in self._files.values():
+                writer.close()
+            self._files.clear()
+            if self.format == 'parquet' and self._parts:
+                pq.write_metadata(
+                    self.schema, os.path.join(self.root, '_common_metadata')
+                    )
+
+
+class ndjson_sink():
+    """Streams pages of raw records as NDJSON, one record per line, to a
+    file or a binary stream (stdout by default). Pages are written whole
+    under a lock, so several sinks sharing a lock can share one stream.
+    """
+
+    def __init__(
+            self,
+            path: str = None,
+            stream=None,
+            tag: str = None,
+            lock: threading.Lock = None
+            ) -> None:
+        """
+        Args:
+            path (str, optional): file to write. Defaults to None.
+            stream (binary file, optional): stream to write when no path
+                is given. Defaults to sys.stdout.buffer.
+            tag (str, optional): value of an '_endpoint' field added to
+                every record, to tell endpoints apart on a shared stream.
+                Defaults to None (records written as is).
+            lock (threading.Lock, optional): lock shared with other sinks
+                writing to the same stream. Defaults to a new lock.
+        """
+        if path is not None:
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            self._stream = open(path, 'wb')
+        else:
+            self._stream = stream or sys.stdout.buffer
+        self._owned = path is not None
+        self.tag = tag
+        self.records_written = 0
+        self._lock = lock or threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Flush, and close the file if this sink opened it."""
+        self._stream.flush()
+        if self._owned:
+            self._stream.close()
+
+    def write_page(self, records: list) -> int:
+        """Write one page of raw records.
+
+        Args:
+            records (list): raw records.
+
+        Returns:
+            int: nbr records written.
+        """
+        if self.tag is not None:
+            records = [{'_endpoint': self.tag, **r} for r in records]
+        data = to_ndjson(records)
+        with self._lock:
+            self._stream.write(data)
+            self.records_written += len(records)
+        return len(records)
+
+    def write(self, pages) -> int:
+        """Write every page of an iter_* generator (raw=True).
+
+        Args:
+            pages (iterable): pages of raw records.
+
+        Returns:
+            int: nbr records written.
+        """
+        return sum(self.write_page(page) for page in pages)
+
+
+class csv_sink():
+    """Streams pages of raw records into one CSV file. Nested fields are
+    flattened to dotted columns and lists are written as JSON text.
+    Columns first seen in later pages are appended to the header, and
+    rows written before them end early. The header line is rewritten on
+    close if it grew.
+    """
+
+    def __init__(self, path: str) -> None:
+        """
+        Args:
+            path (str): CSV file to write.
+        """
+        self.path = path
+        self.records_written = 0
+        self._file = None
+        self._writer = None
+        self._grown = False
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Close the file, rewriting its header line if columns were
+        added after the first page."""
+        with self._lock:
+            if self._file is None or self._file.closed:
+                return
+            self._file.close()
+            if not self._grown:
+                return
+            tmp = f'{self.path}.tmp'
+            with open(self.path, newline='') as old, \
+                    open(tmp, 'w', newline='') as new:
+                old.readline()
+                csv.writer(new).writerow(self._writer.fieldnames)
+                shutil.copyfileobj(old, new)
+            os.replace(tmp, self.path)
+            self._grown = False
+
+    def write_page(self, records: list) -> int:
+        """Write one page of raw records.
+
+        Args:
+            records (list): raw records.
+
+        Returns:
+            int: nbr records written.
+        """
+        rows = [_flat_row(record) for record in records]
+        columns = dict.fromkeys(key for row in rows for key in row)
+        with self._lock:
+            if self._writer is None:
+                os.makedirs(
+                    os.path.dirname(self.path) or '.', exist_ok=True
+                    )
+                self._file = open(self.path, 'w', newline='')
+                self._writer = csv.DictWriter(self._file, list(columns))
+                self._writer.writeheader()
+            new = [
+                col for col in columns if col not in self._writer.fieldnames
+                ]
+            if new:
+                self._writer.fieldnames.extend(new)
+                self._grown = True
+            self._writer.writerows(rows)
+            self.records_written += len(rows)
+        return len(rows)
+
+    def write(self, pages) -> int:
+        """Write every page of an iter_* generator (raw=True).
+
+        Args:
+            pages (iterable): pages of raw records.
+
+        Returns:
+            int: nbr records written.
+        """
+        return sum(self.write_page(page) for page in pages)
+
+
+def _drain(pages: Queue, write) -> int:
+    """Write pages from a queue until the None sentinel. After a failed
+    write the remaining pages are still consumed, so the producer never
+    blocks on a full queue, and the error is raised at the end."""
+    written = 0
+    error = None
+    while True:
+        page = pages.get()
+        if page is None:
+            break
+        if error is None:
+            try:
+                written += write(page)
+            except Exception as e:
+                error = e
+    if error is not None:
+        raise error
+    return written
+
+
+def export_endpoints(
+        client: blaze_retail_api,
+        sinks: dict,
+        max_workers: int = None,
+        queue_size: int = 8,
+        **kwargs
+        ) -> dict:
+    """Export several endpoints at once, each as a pipeline: its pages are
+    fetched and decoded on max_workers threads, flattened by its iter_*
+    generator, and handed over a bounded queue to a writer thread, so the
+    network, parsing and writing overlap. Endpoints run concurrently.
+
+    Args:
+        client (blaze_retail_api): client to fetch with; its pool_maxsize
+            should cover max_workers * len(sinks) connections.
+        sinks (dict): endpoint (see EXPORT_ENDPOINTS) -> sink with a
+            write_page(records) method, e.g. ndjson_sink, csv_sink or
+            dataset_sink.
+        max_workers (int, optional): page fetching threads per endpoint.
+            Defaults to None (serial).
+        queue_size (int, optional): max pages waiting to be written per
+            endpoint. Defaults to 8.
+        **kwargs: start_date / end_date, passed to the endpoints in
+            DATED_ENDPOINTS.
+
+    Returns:
+        dict: endpoint -> nbr records written.
+    """
+    def run(endpoint: str) -> int:
+        pages = Queue(maxsize=queue_size)
+        params = kwargs if endpoint in DATED_ENDPOINTS else {}
+        with ThreadPoolExecutor(max_workers=1) as writer:
+            written = writer.submit(_drain, pages, sinks[endpoint].write_page)
+            try:
+                for page in getattr(client, f'iter_{endpoint}')(
+                        max_workers=max_workers, raw=True, **params
+                        ):
+                    pages.put(page)
+            finally:
+                pages.put(None)
+            return written.result()
+
+    with ThreadPoolExecutor(max_workers=len(sinks) or 1) as executor:
+        return dict(zip(sinks, executor.map(run, sinks)))
+
+
+class async_blaze_retail_api():
+    """asyncio counterpart of blaze_retail_api, built on aiohttp.
+    Methods are coroutines returning the same DataFrames. Pages after the
+    first are fetched concurrently, bounded by max_concurrency requests in
+    flight per client. Non-200 responses raise aiohttp.ClientResponseError.
+    """
+
+    def __init__(
+            self,
+            partner_key=os.getenv('blz_partner_key'),
+            Authorization=os.getenv('blz_api_key'),
+            base_url: str = BASE_URL,
+            max_concurrency: int = 10,
+            timeout: tuple = (5, 60),
+            scheduler: request_scheduler = None,
+            json_loads=None
             ) -> None:
-        try:
-            self.partner_key = partner_key
-            self.Authorization = Authorization
-        except Exception as e:
-            print(e)
+        """
+        Args:
+            partner_key (str, optional): BLAZE partner key.
+                Defaults to env var blz_partner_key.
+            Authorization (str, optional): BLAZE API key.
+                Defaults to env var blz_api_key.
+            base_url (str, optional): partner API root, e.g. a local mock
+                server. Defaults to BASE_URL.
+            max_concurrency (int, optional): max nbr of requests in flight,
+                also the connection pool size. Defaults to 10.
+            timeout (tuple, optional): (connect, read) timeout in seconds
+                for every request. Defaults to (5, 60).
+            scheduler (request_scheduler, optional): rate limit and retry
+                policy. Defaults to request_scheduler().
+            json_loads (callable, optional): parser for response bodies.
+                Defaults to orjson.loads when installed, else json.loads.
+        """
+        if aiohttp is None:
+            raise ImportError(
+                'async_blaze_retail_api requires aiohttp: pip install aiohttp'
+                )
+        self.partner_key = partner_key
+        self.Authorization = Authorization
         assert not (self.partner_key is None or self.Authorization is None)
 
-        self.inventories = self._get_inventory_locations()\
-            .set_index('name')['id'].to_dict()
+        self.base_url = base_url
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.scheduler = scheduler or request_scheduler()
+        self.json_loads = json_loads or _json_loads
+        self.inventories = None
+        self._session = None
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback) -> None:
+        await self.close()
+
+    async def close(self) -> None:
+        """Close the aiohttp session and its connections."""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def _get_session(self) -> 'aiohttp.ClientSession':
+        """Create the pooled session on first use, inside the running loop.
+
+        Returns:
+            aiohttp.ClientSession: session with auth headers set.
+        """
+        if self._session is None:
+            self._session = aiohttp.ClientSession(
+                headers={
+                    'partner_key': self.partner_key,
+                    'Authorization': self.Authorization,
+                    'Accept-Encoding': 'gzip, deflate'
+                    },
+                connector=aiohttp.TCPConnector(limit=self.max_concurrency),
+                timeout=aiohttp.ClientTimeout(
+                    sock_connect=self.timeout[0],
+                    sock_read=self.timeout[1]
+                    )
+                )
+        return self._session
+
+    def _url(self, endpoint: str) -> str:
+        """Full url of a BLAZE partner endpoint.
+
+        Args:
+            endpoint (str): key of PATHS.
+
+        Returns:
+            str: endpoint url.
+        """
+        return self.base_url + PATHS[endpoint]
+
+    async def _fetch_page(self, url: str, params: dict = None) -> dict:
+        """Fetch and decode a single page.
+
+        Args:
+            url (str): endpoint url.
+            params (dict, optional): query params. Defaults to None.
+
+        Retryable statuses and connection errors are retried with the
+        scheduler's rate limit and backoff policy.
+
+        Raises:
+            aiohttp.ClientResponseError: on any non-200 response once
+                retries are exhausted.
+
+        Returns:
+            dict: decoded response body.
+        """
+        params = {k: v for k, v in (params or {}).items() if v is not None}
+        scheduler = self.scheduler
+        attempt = 0
+        while True:
+            await asyncio.sleep(scheduler.wait_time())
+            try:
+                async with self._semaphore:
+                    async with self._get_session().get(
+                            url, params=params
+                            ) as resp:
+                        scheduler.record(
+                            resp.status in scheduler.THROTTLE_STATUSES
+                            )
+                        if resp.status not in scheduler.RETRY_STATUSES or\
+                                attempt >= scheduler.max_retries:
+                            resp.raise_for_status()
+                            return self.json_loads(await resp.read())
+                        delay = scheduler.retry_delay(attempt, resp.headers)
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                if attempt >= scheduler.max_retries:
+                    raise
+                delay = scheduler.retry_delay(attempt)
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def _paginate(
+            self,
+            url: str,
+            params: dict = None,
+            paging: str = 'skip',
+            skip: int = 0,
+            limit: int = None
+            ) -> list:
+        """Fetch every page of a paginated BLAZE endpoint. The first page
+        gives 'total' and 'limit'; the remaining offsets are then gathered
+        concurrently and reassembled in offset order.
+
+        Args:
+            url (str): endpoint url.
+            params (dict, optional): query params other than paging.
+                Defaults to None.
+            paging (str, optional): 'skip' or 'start'. Defaults to 'skip'.
+            skip (int, optional): nbr records to skip at first API call.
+                Defaults to 0.
+            limit (int, optional): page size to request. Defaults to None
+                (server default).
+
+        Returns:
+            list: raw records from the 'values' of every page.
+        """
+        if paging not in ('skip', 'start'):
+            raise ValueError(f'Unknown paging style: {paging}')
+
+        def page_params(offset: int) -> dict:
+            _params = dict(params or {})
+            _params[paging] = offset
+            if limit is not None:
+                _params['limit'] = limit
+            return _params
 
-    def get_products(self, skip: int = 0) -> pd.DataFrame:
+        body = await self._fetch_page(url, page_params(skip))
+        values = body.get('values') or []
+        records = list(values)
+        page_limit = body.get('limit') or len(values)
+        total = body.get('total') or 0
+        if not values or skip + page_limit >= total:
+            return records
+
+        bodies = await asyncio.gather(*(
+            self._fetch_page(url, page_params(offset))
+            for offset in range(skip + page_limit, total, page_limit)
+            ))
+        for body in bodies:
+            records.extend(body.get('values') or [])
+        return records
+
+    async def get_products(self, skip: int = 0) -> pd.DataFrame:
         """
         Retrieve all products from BLAZE API.
         Args:
@@ -30,142 +4064,61 @@ class blaze_retail_api():
         Returns:
             pd.DataFrame: df of all products
         """
-        url = "https://api.partners.blaze.me/api/v1/partner/products"
-
-        headers = {
-            'partner_key': self.partner_key,
-            'Authorization': self.Authorization
-            }
-        params = {'skip': skip}
-
-        response = requests.get(url, headers=headers, params=params)
-        if response.status_code == 200:
-            dat = pd.DataFrame().from_records(response.json().get('values'))
-            if skip >= response.json().get('total'):
-                return dat
-            else:
-                return(
-                    pd.concat([
-                        dat,
-                        self.get_products(
-                            skip=skip + response.json().get('limit')
-                            )
-                    ])
-                )
-        else:
-            return(
-                'Error retrieving products: with'
-                f' status code {response.status_code}'
-                )
+        records = await self._paginate(
+            self._url('products'), paging='skip', skip=skip
+            )
+        return pd.DataFrame().from_records(records)
 
-    def get_vendors(self, skip: int = 0) -> pd.DataFrame:
+    async def get_vendors(self, skip: int = 0) -> pd.DataFrame:
         """
-        Get all vendors from BLAZE, recursively
+        Get all vendors from BLAZE.
         Args:
             skip (int, optional): nbr records to skip. Defaults to 0.
         Returns:
             pd.DataFrame: vendors data
         """
-        url = "https://api.partners.blaze.me/api/v1/partner/vendors"
-
-        headers = {
-            'partner_key': self.partner_key,
-            'Authorization': self.Authorization
-            }
-        params = {'skip': skip}
-        response = requests.get(url, headers=headers, params=params)
-        if response.status_code == 200:
-            dat = pd.DataFrame().from_records(
-                    response.json().get('values')
-                    ).rename(
-                columns={
-                    'name': 'vendor_name'
-                    }
-                ).drop_duplicates('id')
-            if skip >= response.json().get('total'):
-                return dat
-            else:
-                return(
-                    pd.concat([
-                        dat,
-                        self.get_vendors(
-                            skip=skip + response.json().get('limit')
-                            )
-                    ])
-                )
-        else:
-            return(
-                'Error retrieving products: with status code'
-                f' {response.status_code}'
-                )
+        records = await self._paginate(
+            self._url('vendors'), paging='skip', skip=skip
+            )
+        return _vendors_frame(records)
 
-    def get_categories(self) -> None:
+    async def get_categories(self) -> pd.DataFrame:
         """Get all categories under current context.
 
         Returns:
-            None
+            pd.DataFrame: categories data
         """
+        body = await self._fetch_page(self._url('categories'))
+        return pd.json_normalize(body.get('values'))
 
-        url = (
-            'https://api.partners.blaze.me/api/v1/'
-            'partner/store/inventory/categories'
-            )
-        headers = {
-            'partner_key': self.partner_key,
-            'Authorization': self.Authorization
-            }
-        response = requests.get(url, headers=headers)
-
-        if response.status_code == 200:
-            return pd.json_normalize(response.json().get('values'))
-        else:
-            return(
-                'Error retrieving categories: with status code'
-                f' {response.status_code}'
-                )
-
-    def get_brands(self, skip: int = 0) -> pd.DataFrame:
+    async def get_brands(self, skip: int = 0) -> pd.DataFrame:
         """
-        Get all brands from BLAZE API recursively
+        Get all brands from BLAZE API.
         Args:
             skip (int, optional): nbr of records to skip (api param).
                 Defaults to 0.
         Returns:
             pd.DataFrame: Brands data
         """
-        url = (
-            'https://api.partners.blaze.me/api/v1/'
-            'partner/store/inventory/brands'
+        records = await self._paginate(
+            self._url('brands'), paging='start', skip=skip, limit=200
             )
+        return pd.json_normalize(records)
 
-        headers = {
-            'partner_key': self.partner_key,
-            'Authorization': self.Authorization
-            }
-        params = {'limit': 200, 'start': skip}
-        response = requests.get(url, headers=headers, params=params)
-        if response.status_code == 200:
-            dat = pd.DataFrame().from_records(
-                pd.json_normalize(response.json().get('values'))
-                )
-            if skip >= response.json().get('total'):
-                return dat
-            else:
-                return(
-                    pd.concat([
-                        dat,
-                        self.get_brands(
-                            skip=skip + response.json().get('limit')
-                            )
-                    ])
-                )
-        else:
-            return(
-                'Error retrieving products: with status code '
-                f'{response.status_code}'
-                )
+    async def get_inventories(self) -> pd.DataFrame:
+        """Gets inventory locations for the current shop context and
+        caches their name -> id mapping in <object>.inventories.
 
-    def get_curr_inventory(
+        Returns:
+            pd.DataFrame: DF of inventories active in BLAZE retail
+            and their attributes
+        """
+        body = await self._fetch_page(self._url('inventories'))
+        dat = pd.json_normalize(body.get('values'))
+        self.inventories = dat.set_index('name')['id'].to_dict()
+        return dat
+
+    async def get_curr_inventory(
             self,
             skip: int = 0,
             inventory: str = 'Safe'
@@ -179,77 +4132,17 @@ class blaze_retail_api():
         Returns:
             pd.DataFrame: batch quantity df
         """
-
-        url = (
-            'https://api.partners.blaze.me/api/v1/'
-            'partner/store/batches/quantities'
-            )
-        headers = {
-            'partner_key': self.partner_key,
-            'Authorization': self.Authorization
-            }
-        params = {
-            'inventoryId': self.inventories.get(inventory),
-            'start': skip
-            }
-
-        response = requests.get(url, headers=headers, params=params)
-
-        if response.status_code == 200:
-            dat = pd.DataFrame().from_records(
-                pd.json_normalize(response.json().get('values'))
-                )
-            if skip >= response.json().get('total'):
-                return dat
-            else:
-                return (
-                    pd.concat([
-                        dat,
-                        self.get_curr_inventory(
-                            skip=skip + response.json().get('limit'),
-                            inventory=inventory
-                            )
-                        ])
-                    )
-        else:
-            return (
-                f'Error retrieving inventory: {inventory} with '
-                f'id {self.inventories.get(inventory)} with status '
-                f'code {response.status_code}'
-                )
-
-    def _get_inventory_locations(self) -> pd.DataFrame:
-        """Gets inventory locations for the current shop context.
-         Primarily used for __init__
-        but can be called directly. Or use <object>.inventories for a
-        list of inventories
-        in the current context.
-
-        Returns:
-            pd.DataFrame: DF of inventories active in BLAZE retail
-            and their attributes
-        """
-        url = (
-            'https://api.partners.blaze.me/api/v1/partner/'
-            'store/inventory/inventories'
+        if self.inventories is None:
+            await self.get_inventories()
+        records = await self._paginate(
+            self._url('batch_quantities'),
+            params={'inventoryId': self.inventories.get(inventory)},
+            paging='start',
+            skip=skip
             )
-        headers = {
-            'partner_key': self.partner_key,
-            'Authorization': self.Authorization
-            }
-        response = requests.get(url, headers=headers)
-        if response.status_code == 200:
-            dat = pd.DataFrame().from_records(
-                pd.json_normalize(response.json().get('values'))
-                )
-            return dat
-        else:
-            return (
-                'Error retrieving inventory locations with'
-                f' status code {response.status_code}'
-                )
+        return pd.json_normalize(records)
 
-    def get_members(
+    async def get_members(
             self,
             start_date: str = (
                 datetime.today() - timedelta(days=1)
@@ -258,10 +4151,7 @@ class blaze_retail_api():
             skip: int = 0,
             limit: int = 100
             ) -> pd.DataFrame:
-        """Get DF of members under current context according to dates given.
-        Dates given reflect member
-        join date. If member joined between given dates,
-        then member will be retrieved.
+        """Get DF of members who joined between the dates given.
 
         Args:
             start_date (str, optional): start date of window.
@@ -273,50 +4163,23 @@ class blaze_retail_api():
         Returns:
             pd.DataFrame: DF of members and their attributes.
         """
-        epoch_offset = 1000  # offset for datetime for BLAZE TS format
-        _start_date = int(
-            datetime.strptime(
-                start_date,
-                '%m/%d/%Y'
-                ).timestamp() * epoch_offset
-            )
-        _end_date = int(
-            datetime.strptime(
-                end_date,
-                '%m/%d/%Y'
-                ).timestamp() * epoch_offset
-            )
-        url = 'https://api.partners.blaze.me/api/v1/partner/members'
-        headers = {
-            'partner_key': self.partner_key,
-            'Authorization': self.Authorization
-            }
-        params = {
-            'startDate': _start_date,
-            'endDate': _end_date,
-            'skip': skip,
-            'limit': limit
-            }
-        response = requests.get(url, headers=headers, params=params)
-        if response.status_code == 200:
-            dat = pd.DataFrame().from_records(
-                pd.json_normalize(response.json().get('values'))
-                )
-            if skip >= response.json().get('total'):
-                return dat
-            else:
-                return(
-                    pd.concat([
-                        dat,
-                        self.get_members(
-                            start_date=start_date,
-                            end_date=end_date,
-                            skip=skip + response.json().get('limit')
-                            )
-                        ])
-                    )
+        records = await self._paginate(
+            self._url('members'),
+            params={
+                'startDate': _to_epoch_ms(start_date),
+                'endDate': _to_epoch_ms(end_date)
+                },
+            paging='skip',
+            skip=skip,
+            limit=limit
+            )
+        return pd.json_normalize(records)
 
-    def get_employees(self, skip: int = 0, limit: int = 200) -> pd.DataFrame:
+    async def get_employees(
+            self,
+            skip: int = 0,
+            limit: int = 200
+            ) -> pd.DataFrame:
         """Get all employee records under the current context.
 
         Args:
@@ -327,35 +4190,12 @@ class blaze_retail_api():
         Returns:
             pd.DataFrame: dataframe of all employees and details.
         """
+        records = await self._paginate(
+            self._url('employees'), paging='start', skip=skip, limit=limit
+            )
+        return pd.json_normalize(records)
 
-        url = 'https://api.partners.blaze.me/api/v1/partner/employees'
-        headers = {
-            'partner_key': self.partner_key,
-            'Authorization': self.Authorization
-            }
-        params = {'start': skip, 'limit': limit}
-        response = requests.get(url, headers=headers, params=params)
-        if response.status_code == 200:
-            dat = pd.DataFrame().from_records(
-                pd.json_normalize(response.json().get('values'))
-                )
-            if skip >= response.json().get('total'):
-                dat = pd.DataFrame().from_records(
-                    response.json().get('values')
-                    )
-                return dat
-            else:
-                return(
-                    pd.concat([
-                        dat,
-                        self.get_employees(
-                            skip=skip + response.json().get('limit'),
-                            limit=limit
-                            )
-                        ])
-                    )
-
-    def get_item_sales(
+    async def get_item_sales(
             self,
             start_date: str = (
                 datetime.today() - timedelta(days=1)
@@ -372,44 +4212,21 @@ class blaze_retail_api():
             end_date (str, optional): date window end. Defaults to today.
             skip (int, optional): nbr records to skip in API call.
                 Defaults to 0.
+            limit (int, optional): page size. Defaults to 100.
 
         Returns:
             pd.DataFrame: dataframe of line item sales and details.
         """
-        url = "https://api.partners.blaze.me/api/v1/partner/transactions"
-        headers = {
-            'partner_key': self.partner_key,
-            'Authorization': self.Authorization
-            }
-        params = {
-            'startDate': start_date,
-            'endDate': end_date,
-            'skip': skip,
-            'limit': limit
-            }
-        response = requests.get(url, headers=headers, params=params)
-        if response.status_code == 200:
-            dat = pd.DataFrame(
-                list(
-                    pd.json_normalize(
-                        response.json().get('values')
-                        )['cart.items'].explode().reset_index(drop=True)
-                    )
-                )
-            if skip + response.json().get('limit') >=\
-                    response.json().get('total'):
-                return dat
-            else:
-                return pd.concat([
-                    dat,
-                    self.get_item_sales(
-                        start_date=start_date,
-                        end_date=end_date,
-                        skip=skip + response.json().get('limit')
-                        )
-                    ])
+        records = await self._paginate(
+            self._url('transactions'),
+            params={'startDate': start_date, 'endDate': end_date},
+            paging='skip',
+            skip=skip,
+            limit=limit
+            )
+        return _item_sales_frame(records)
 
-    def get_transactions(
+    async def get_transactions(
             self,
             start_date: str = (
                 datetime.today() - timedelta(days=1)
@@ -427,38 +4244,21 @@ class blaze_retail_api():
                 Defaults to today.
             skip (int, optional): nbr records to skip in API call.
                 Defaults to 0.
+            limit (int, optional): page size. Defaults to 100.
 
         Returns:
            pd.DataFrame: dataframe of transactions and details (header level).
         """
-        url = 'https://api.partners.blaze.me/api/v1/partner/transactions'
-        headers = {
-            'partner_key': self.partner_key,
-            'Authorization': self.Authorization
-            }
-        params = {
-            'startDate': start_date,
-            'endDate': end_date,
-            'skip': skip,
-            'limit': limit
-            }
-        response = requests.get(url, headers=headers, params=params)
-        if response.status_code == 200:
-            dat = pd.json_normalize(response.json().get('values'))
-            if skip + response.json().get("limit") >=\
-                    response.json().get('total'):
-                return dat
-            else:
-                return pd.concat([
-                    dat,
-                    self.get_item_sales(
-                        start_date=start_date,
-                        end_date=end_date,
-                        skip=skip + response.json().get('limit')
-                        )
-                    ])
+        records = await self._paginate(
+            self._url('transactions'),
+            params={'startDate': start_date, 'endDate': end_date},
+            paging='skip',
+            skip=skip,
+            limit=limit
+            )
+        return pd.json_normalize(records)
 
-    def get_purchase_orders(
+    async def get_purchase_orders(
             self,
             start_date: str = (
                 datetime.today() - timedelta(days=1)
@@ -481,37 +4281,16 @@ class blaze_retail_api():
         Returns:
             pd.DataFrame: purchase orders records and details.
         """
-        url = (
-            'https://api.partners.blaze.me/api/v1/'
-            'partner/purchaseorders/list'
+        records = await self._paginate(
+            self._url('purchase_orders'),
+            params={'startDate': start_date, 'endDate': end_date},
+            paging='start',
+            skip=skip,
+            limit=limit
             )
-        headers = {
-            'partner_key': self.partner_key,
-            'Authorization': self.Authorization
-            }
-        params = {
-            'startDate': start_date,
-            'endDate': end_date,
-            'start': skip,
-            'limit': limit
-            }
-        response = requests.get(url, headers=headers, params=params)
-        if response.status_code == 200:
-            dat = pd.json_normalize(response.json().get('values'))
-            if skip + response.json().get("limit") >=\
-                    response.json().get('total'):
-                return dat
-            else:
-                return pd.concat([
-                    dat,
-                    self.get_purchase_orders(
-                        start_date=start_date,
-                        end_date=end_date,
-                        skip=skip + response.json().get('limit')
-                        )
-                    ])
+        return pd.json_normalize(records)
 
-    def get_po_line_items(
+    async def get_po_line_items(
             self,
             start_date: str = (
                 datetime.today() - timedelta(days=1)
@@ -534,47 +4313,175 @@ class blaze_retail_api():
         Returns:
             pd.DataFrame: purchase order line items and details.
         """
-        url = (
-            'https://api.partners.blaze.me/api/v1/'
-            'partner/purchaseorders/list'
+        records = await self._paginate(
+            self._url('purchase_orders'),
+            params={'startDate': start_date, 'endDate': end_date},
+            paging='start',
+            skip=skip,
+            limit=limit
             )
-        headers = {
-            'partner_key': self.partner_key,
-            'Authorization': self.Authorization
+        return _po_line_items_frame(records)
+
+
+async def gather_endpoints(calls, max_concurrency: int = 4):
+    """Run several endpoint coroutines concurrently, at most
+    max_concurrency at a time. Useful to pull catalog, inventory and sales
+    for many shops at once, e.g.:
+
+        await gather_endpoints({
+            ('shop_a', 'products'): shop_a.get_products(),
+            ('shop_b', 'products'): shop_b.get_products()
+            })
+
+    Args:
+        calls (dict | list): coroutines, either keyed by name or as a list.
+        max_concurrency (int, optional): max nbr of calls running at once.
+            Defaults to 4.
+
+    Returns:
+        dict | list: results with the same keys / order as calls.
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def bounded(coro):
+        async with semaphore:
+            return await coro
+
+    if isinstance(calls, dict):
+        results = await asyncio.gather(*map(bounded, calls.values()))
+        return dict(zip(calls.keys(), results))
+    return await asyncio.gather(*map(bounded, calls))
+
+
+def main(argv: list = None) -> int:
+    """Command line entry point, e.g.
+    python -m blaze_retail_api export transactions item_sales \\
+        --start-date 01/01/2023 --end-date 02/01/2023 --workers 8 \\
+        --format parquet --output data
+
+    Credentials are read from the blz_partner_key and blz_api_key
+    environment variables.
+
+    Args:
+        argv (list, optional): arguments. Defaults to sys.argv[1:].
+
+    Returns:
+        int: exit status.
+    """
+    parser = ArgumentParser(
+        prog='python -m blaze_retail_api',
+        description='Bulk export from the BLAZE partner API.'
+        )
+    commands = parser.add_subparsers(dest='command', required=True)
+    export = commands.add_parser(
+        'export', help='export endpoints as NDJSON, CSV or Parquet'
+        )
+    export.add_argument('endpoints', nargs='+', choices=EXPORT_ENDPOINTS)
+    export.add_argument(
+        '--start-date',
+        default=(datetime.today() - timedelta(days=1)).strftime('%m/%d/%Y'),
+        help='MM/DD/YYYY, for dated endpoints; members also take '
+        'MM/DD/YYYY HH:MM (default yesterday)'
+        )
+    export.add_argument(
+        '--end-date', default=datetime.today().strftime('%m/%d/%Y'),
+        help='MM/DD/YYYY, for dated endpoints; members also take '
+        'MM/DD/YYYY HH:MM (default today)'
+        )
+    export.add_argument(
+        '--workers', type=int, default=4,
+        help='page fetching threads per endpoint (default 4)'
+        )
+    export.add_argument(
+        '--format', choices=('ndjson', 'csv', 'parquet'), default='ndjson'
+        )
+    export.add_argument(
+        '--output',
+        help='output directory, one file (csv, ndjson) or dataset '
+        '(parquet) per endpoint; ndjson goes to stdout without it'
+        )
+    export.add_argument(
+        '--shop', help='shop partition for records without a shopId'
+        )
+    export.add_argument('--base-url', default=BASE_URL)
+    args = parser.parse_args(argv)
+
+    partner_key = os.getenv('blz_partner_key')
+    api_key = os.getenv('blz_api_key')
+    if partner_key is None or api_key is None:
+        parser.error('set the blz_partner_key and blz_api_key env vars')
+    if args.output is None and args.format != 'ndjson':
+        parser.error(f'--output is required for {args.format}')
+
+    endpoints = list(dict.fromkeys(args.endpoints))
+    for date in (args.start_date, args.end_date):
+        timed = ' ' in date
+        try:
+            datetime.strptime(date, '%m/%d/%Y %H:%M' if timed else '%m/%d/%Y')
+        except ValueError:
+            parser.error(f'invalid date {date!r}, expected MM/DD/YYYY')
+        untimed = [
+            endpoint for endpoint in endpoints
+            if endpoint in DATED_ENDPOINTS and endpoint != 'members'
+            ]
+        if timed and untimed:
+            parser.error(
+                f'{", ".join(untimed)} only take MM/DD/YYYY dates, '
+                f'not {date!r}'
+                )
+    if args.format == 'parquet':
+        sinks = {
+            endpoint: dataset_sink(
+                os.path.join(args.output, endpoint), shop=args.shop,
+                date_field=None if endpoint == 'curr_inventory'
+                else 'created'
+                )
+            for endpoint in endpoints
             }
-        params = {
-            'startDate': start_date,
-            'endDate': end_date,
-            'start': skip,
-            'limit': limit
+    elif args.format == 'csv':
+        sinks = {
+            endpoint: csv_sink(os.path.join(args.output, f'{endpoint}.csv'))
+            for endpoint in endpoints
+            }
+    elif args.output is not None:
+        sinks = {
+            endpoint: ndjson_sink(
+                os.path.join(args.output, f'{endpoint}.ndjson')
+                )
+            for endpoint in endpoints
+            }
+    else:
+        lock = threading.Lock()
+        sinks = {
+            endpoint: ndjson_sink(
+                tag=endpoint if len(endpoints) > 1 else None, lock=lock
+                )
+            for endpoint in endpoints
             }
-        response = requests.get(url, headers=headers, params=params)
 
-        if response.status_code == 200:
-            dat = pd.DataFrame(
-                    list(
-                        pd.json_normalize(
-                            response.json().get('values')
-                        )['poProductRequestResultList'].explode().reset_index(
-                            drop=True
-                            )
-                    )
+    pool_size = args.workers * len(endpoints)
+    start = time.perf_counter()
+    with blaze_retail_api(
+            partner_key=partner_key, Authorization=api_key,
+            base_url=args.base_url, pool_connections=len(endpoints),
+            pool_maxsize=pool_size
+            ) as client:
+        try:
+            written = export_endpoints(
+                client, sinks, max_workers=args.workers,
+                start_date=args.start_date, end_date=args.end_date
                 )
-            if skip + response.json().get("limit") >=\
-                    response.json().get('total'):
-                return dat
-            else:
-                return pd.concat([
-                    dat,
-                    self.get_po_line_items(
-                        start_date=start_date,
-                        end_date=end_date,
-                        skip=skip + response.json().get('limit')
-                        )
-                    ])
+        finally:
+            for sink in sinks.values():
+                if hasattr(sink, 'close'):
+                    sink.close()
+    for endpoint, count in written.items():
+        print(f'{endpoint}: {count} records', file=sys.stderr)
+    print(
+        f'exported in {time.perf_counter() - start:.1f}s', file=sys.stderr
+        )
+    return 0
 
 
 if __name__ == '__main__':
-    b = blaze_retail_api()
-    po = b.get_po_line_items()
-    t = b.get_transactions()
+    sys.exit(main())
@@ -0,0 +1,293 @@
+import gzip
+import json
+import random
+import threading
+import time
+import urllib.parse
+from argparse import ArgumentParser
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from blaze_retail_api import PATHS
+
+PREFIX = '/api/v1/partner'
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 500
+EPOCH = 1672531200000  # 01/01/2023 in epoch ms
+
+# endpoints paged with start/limit; the others page with skip/limit
+START_PAGED = ('brands', 'batch_quantities', 'employees', 'purchase_orders')
+INVENTORIES = ('Safe', 'Shop', 'Quarantine')
+
+
+def _base(prefix: str, i: int) -> dict:
+    return {
+        'id': f'{prefix}{i:08d}',
+        'companyId': 'company0001',
+        'shopId': 'shop0001',
+        'created': EPOCH + i * 60000,
+        'modified': EPOCH + i * 60000 + 30000,
+        'deleted': False
+        }
+
+
+def make_record(endpoint: str, i: int) -> dict:
+    """Deterministic synthetic record nbr i of an endpoint, shaped like the
+    BLAZE partner payloads the client reads.
+
+    Args:
+        endpoint (str): key of PATHS.
+        i (int): record index.
+
+    Returns:
+        dict: raw record.
+    """
+    if endpoint == 'products':
+        return {
+            **_base('prd', i), 'sku': f'SKU{i}', 'name': f'Product {i}',
+            'categoryId': f'cat{i % 20:08d}', 'brandId': f'brd{i % 150:08d}',
+            'vendorId': f'vnd{i % 80:08d}', 'unitPrice': 5 + i % 60,
+            'flowerType': ('Indica', 'Sativa', 'Hybrid')[i % 3],
+            'weightPerUnit': 'EACH', 'active': i % 10 != 0
+            }
+    if endpoint == 'vendors':
+        return {
+            **_base('vnd', i), 'name': f'Vendor {i}',
+            'vendorType': 'VENDOR', 'active': True
+            }
+    if endpoint == 'brands':
+        return {**_base('brd', i), 'name': f'Brand {i}', 'active': True}
+    if endpoint == 'categories':
+        return {
+            **_base('cat', i), 'name': f'Category {i}',
+            'unitType': ('units', 'grams')[i % 2], 'active': True
+            }
+    if endpoint == 'inventories':
+        return {
+            **_base('inv', i), 'name': INVENTORIES[i % len(INVENTORIES)],
+            'active': True
+            }
+    if endpoint == 'batch_quantities':
+        return {
+            **_base('bq', i), 'batchId': f'bat{i:08d}',
+            'productId': f'prd{i % 5000:08d}', 'inventoryId': 'inv00000000',
+            'quantity': float(i % 250)
+            }
+    if endpoint == 'members':
+        return {
+            **_base('mbr', i), 'firstName': f'First{i}',
+            'lastName': f'Last{i}', 'email': f'member{i}@example.com',
+            'status': ('Active', 'Inactive')[i % 7 == 0],
+            'consumerType': ('AdultUse', 'MedicinalThirdParty')[i % 4 == 0],
+            'loyaltyPoints': float(i % 500)
+            }
+    if endpoint == 'employees':
+        return {
+            **_base('emp', i), 'firstName': f'First{i}',
+            'lastName': f'Last{i}', 'roleId': f'rol{i % 4:08d}',
+            'disabled': False
+            }
+    if endpoint == 'transactions':
+        items = [
+            {
+                **_base('itm', i * 8 + j),
+                'productId': f'prd{(i + j) % 5000:08d}',
+                'batchId': f'bat{(i + j) % 20000:08d}', 'status': 'Active',
+                'quantity': float(1 + j), 'cost': 2.5 * (1 + j),
+                'unitPrice': 10.0, 'discount': 0.0,
+                'finalPrice': 10.0 * (1 + j),
+                'taxResult': {'totalPostCalcTax': 1.5 * (1 + j)}
+                }
+            for j in range(1 + i % 5)
+            ]
+        return {
+            **_base('trx', i), 'transNo': str(100000 + i),
+            'memberId': f'mbr{i % 20000:08d}', 'status': 'Completed',
+            'transType': 'Sale', 'queueType': 'WalkIn',
+            'sellerId': f'emp{i % 25:08d}', 'terminalId': 'trm00000001',
+            'processedTime': EPOCH + i * 60000,
+            'cart': {
+                'total': sum(item['finalPrice'] for item in items),
+                'subTotal': sum(item['finalPrice'] for item in items),
+                'totalDiscount': 0.0,
+                'items': items
+                }
+            }
+    if endpoint == 'purchase_orders':
+        return {
+            **_base('po', i), 'poNumber': f'PO-{i}',
+            'vendorId': f'vnd{i % 80:08d}',
+            'purchaseOrderStatus': ('Closed', 'Approved')[i % 3 == 0],
+            'grandTotal': 100.0 * (1 + i % 9),
+            'poProductRequestResultList': [
+                {
+                    **_base('pol', i * 8 + j),
+                    'productId': f'prd{(i + j) % 5000:08d}',
+                    'requestQuantity': float(10 * (1 + j)),
+                    'receivedQuantity': float(10 * (1 + j)),
+                    'unitPrice': 4.0, 'totalCost': 40.0 * (1 + j)
+                    }
+                for j in range(1 + i % 6)
+                ]
+            }
+    raise ValueError(f'Unknown endpoint: {endpoint}')
+
+
+class mock_blaze_server():
+    """Local stand-in for the BLAZE partner API, serving synthetic,
+    deterministic data from the endpoints blaze_retail_api uses. It honours
+    skip vs start/limit paging the way each endpoint does, and can inject
+    latency and 429 responses. Date filters are accepted but ignored.
+    """
+
+    def __init__(
+            self,
+            records=1000,
+            host: str = '127.0.0.1',
+            port: int = 0,
+            latency: float = 0.0,
+            throttle_rate: float = 0.0,
+            retry_after: float = 1.0
+            ) -> None:
+        """
+        Args:
+            records (int | dict, optional): nbr of records per endpoint, or
+                endpoint -> nbr. Defaults to 1000.
+            host (str, optional): bind address. Defaults to '127.0.0.1'.
+            port (int, optional): bind port, 0 for any free port.
+                Defaults to 0.
+            latency (float, optional): seconds added to every response.
+                Defaults to 0.0.
+            throttle_rate (float, optional): share of requests answered
+                with 429. Defaults to 0.0.
+            retry_after (float, optional): Retry-After seconds sent with
+                429s. Defaults to 1.0.
+        """
+        if not isinstance(records, dict):
+            records = {
+                endpoint: records for endpoint in PATHS
+                if endpoint != 'inventories'
+                }
+        records.setdefault('inventories', len(INVENTORIES))
+        self.records = records
+        self.latency = latency
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.stats = {'requests': 0, 'throttled': 0, 'bytes': 0}
+        self._lock = threading.Lock()
+        self._routes = {PREFIX + path: name for name, path in PATHS.items()}
+        self._httpd = ThreadingHTTPServer((host, port), self._handler())
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        """Partner API root to pass to blaze_retail_api(base_url=...)."""
+        host, port = self._httpd.server_address[:2]
+        return f'http://{host}:{port}{PREFIX}'
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.stop()
+
+    def start(self):
+        """Serve in a background thread."""
+        self._thread = threading.Thread(
+            target=self._httpd.serve_forever, daemon=True
+            )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop serving and close the socket."""
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def page(self, endpoint: str, params: dict) -> dict:
+        """Body of one page, paged like the real endpoint.
+
+        Args:
+            endpoint (str): key of PATHS.
+            params (dict): query params.
+
+        Returns:
+            dict: response body.
+        """
+        total = self.records.get(endpoint, 0)
+        if endpoint in ('categories', 'inventories'):
+            values = [make_record(endpoint, i) for i in range(total)]
+            return {'values': values, 'total': total}
+        paging = 'start' if endpoint in START_PAGED else 'skip'
+        offset = int(params.get(paging, 0))
+        limit = min(int(params.get('limit', DEFAULT_LIMIT)), MAX_LIMIT)
+        values = [
+            make_record(endpoint, i)
+            for i in range(offset, min(offset + limit, total))
+            ]
+        return {'values': values, 'total': total, paging: offset,
+                'limit': limit}
+
+    def _handler(self):
+        server = self
+
+        class handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args) -> None:
+                pass
+
+            def _send(self, status: int, body: bytes, headers=()) -> None:
+                self.send_response(status)
+                for key, value in headers:
+                    self.send_header(key, value)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self) -> None:
+                url = urllib.parse.urlparse(self.path)
+                endpoint = server._routes.get(url.path)
+                if server.latency:
+                    time.sleep(server.latency)
+                with server._lock:
+                    server.stats['requests'] += 1
+                if endpoint is None:
+                    return self._send(404, b'{}')
+                if random.random() < server.throttle_rate:
+                    with server._lock:
+                        server.stats['throttled'] += 1
+                    return self._send(
+                        429, b'{}',
+                        [('Retry-After', str(server.retry_after))]
+                        )
+                params = dict(urllib.parse.parse_qsl(url.query))
+                body = json.dumps(server.page(endpoint, params)).encode()
+                headers = [('Content-Type', 'application/json')]
+                if 'gzip' in self.headers.get('Accept-Encoding', ''):
+                    body = gzip.compress(body, compresslevel=1)
+                    headers.append(('Content-Encoding', 'gzip'))
+                with server._lock:
+                    server.stats['bytes'] += len(body)
+                self._send(200, body, headers)
+
+        return handler
+
+
+if __name__ == '__main__':
+    parser = ArgumentParser(description='Local mock BLAZE partner API.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--records', type=int, default=1000)
+    parser.add_argument('--latency', type=float, default=0.0)
+    parser.add_argument('--throttle-rate', type=float, default=0.0)
+    args = parser.parse_args()
+    server = mock_blaze_server(
+        records=args.records, host=args.host, port=args.port,
+        latency=args.latency, throttle_rate=args.throttle_rate
+        )
+    print(f'Serving mock BLAZE API at {server.base_url}')
+    try:
+        server._httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()